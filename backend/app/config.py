@@ -1,66 +1,254 @@
 import os
+import json
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from azure.keyvault.secrets import SecretClient
 from azure.identity import ClientSecretCredential
 from dotenv import load_dotenv
+
+try:
+    import fcntl   # POSIX only; Windows falls back to uncoordinated refresh
+except ImportError:
+    fcntl = None
 load_dotenv()
 
-CONFIG = {}
+logger = logging.getLogger(__name__)
 
 USE_KEYVAULT = os.getenv("USE_KEYVAULT", "false").lower() == "true"
 
-if USE_KEYVAULT:
-    kv_name = os.getenv("KEYVAULT_NAME")
-
-    if not kv_name:
-        raise RuntimeError("❌ KEYVAULT_NAME is missing in .env")
-
+# CONFIG key -> Key Vault secret name
+KEYVAULT_SECRETS = {
+    "AZURE_SPEECH_KEY":        "azure-speech-key",
+    "AZURE_SPEECH_REGION":     "azure-speech-region",
+    "AZURE_OPENAI_API_KEY":    "azure-openai-api-key",
+    "AZURE_OPENAI_ENDPOINT":   "azure-openai-endpoint",
+    "AZURE_OPENAI_DEPLOYMENT": "azure-openai-deployment",
+}
+
+# Local secret cache so every worker / CLI start doesn't re-hit Key Vault
+KV_CACHE_PATH = os.path.expanduser(os.getenv("KV_CACHE_PATH", "~/.cache/gdd/kv_cache.json"))
+KV_CACHE_TTL = int(os.getenv("KV_CACHE_TTL", "3600"))   # seconds
+KV_REFRESH = os.getenv("KV_REFRESH", "0") == "1"        # force refresh after rotation
+
+
+def _read_kv_cache(vault: str):
+    """Return cached secrets for this vault if the cache file is fresh, else None."""
+    if KV_REFRESH:
+        return None
+    try:
+        if time.time() - os.path.getmtime(KV_CACHE_PATH) >= KV_CACHE_TTL:
+            return None
+        with open(KV_CACHE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("vault") != vault:
+        return None
+    return data.get("secrets")
+
+
+def _write_kv_cache(vault: str, secrets: dict):
+    """Atomically replace the cache file (owner read/write only)."""
+    try:
+        os.makedirs(os.path.dirname(KV_CACHE_PATH), exist_ok=True)
+        tmp = f"{KV_CACHE_PATH}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"vault": vault, "secrets": secrets}, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, KV_CACHE_PATH)
+    except OSError as e:
+        logger.warning("Could not write KeyVault cache: %s", e)
+
+
+@contextmanager
+def _kv_refresh_lock():
+    """
+    Cross-process lock around a cache refresh, so N workers starting
+    together make one set of Key Vault calls instead of N.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(KV_CACHE_PATH), exist_ok=True)
+        lock_file = open(KV_CACHE_PATH + ".lock", "a")
+    except OSError:
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+KEYVAULT_SCOPE = "https://vault.azure.net/.default"
+
+# Process-wide credential + client: one HTTP pipeline and one AAD token cache
+_kv_credential = None
+_kv_client = None
+_kv_client_lock = threading.Lock()
+
+
+def _get_credential() -> ClientSecretCredential:
+    global _kv_credential
+    if _kv_credential is None:
+        with _kv_client_lock:
+            if _kv_credential is None:
+                # Proper KV auth
+                _kv_credential = ClientSecretCredential(
+                    tenant_id=os.getenv("AZURE_TENANT_ID"),
+                    client_id=os.getenv("AZURE_CLIENT_ID"),
+                    client_secret=os.getenv("AZURE_CLIENT_SECRET")
+                )
+                logger.debug("ClientSecretCredential created")
+    return _kv_credential
+
+
+def _get_secret_client(url: str) -> SecretClient:
+    global _kv_client
+    if _kv_client is None:
+        credential = _get_credential()
+        with _kv_client_lock:
+            if _kv_client is None:
+                logger.info("Connecting to KeyVault: %s", url)
+                # Acquire the AAD token once up front so the parallel
+                # get_secret calls don't each race to fetch their own
+                try:
+                    credential.get_token(KEYVAULT_SCOPE)
+                except Exception as e:
+                    logger.warning("KeyVault token warm-up failed: %s", e)
+                _kv_client = SecretClient(vault_url=url, credential=credential)
+    return _kv_client
+
+
+def _fetch_kv_secrets(url: str) -> dict:
+    client = _get_secret_client(url)
+
+    def _fetch(name):
+        try:
+            return name, client.get_secret(name).value
+        except Exception as e:
+            logger.error("Error while fetching secret '%s': %s", name, e)
+            return name, None
+
+    # Fetch only the secrets we use — no list_properties_of_secrets() paging round-trip.
+    # The gets are independent HTTPS round-trips, so overlap them: ~1 RTT instead of N.
+    names = list(KEYVAULT_SECRETS.values())
+    logger.debug("Fetching secrets: %s", names)
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        return {name: value for name, value in pool.map(_fetch, names) if value is not None}
+
+
+def _load_keyvault_config(kv_name: str) -> dict:
+    """Resolve every Key Vault-backed CONFIG entry (local cache first, then KV)."""
     url = f"https://{kv_name}.vault.azure.net/"
-    print("🔐 Connecting to KeyVault:", url)
-
-    # Proper KV auth
-    credential = ClientSecretCredential(
-        tenant_id=os.getenv("AZURE_TENANT_ID"),
-        client_id=os.getenv("AZURE_CLIENT_ID"),
-        client_secret=os.getenv("AZURE_CLIENT_SECRET")
-    )
-    print("🔑 ClientSecretCredential created OK")
 
-    client = SecretClient(vault_url=url, credential=credential)
+    secrets = _read_kv_cache(kv_name)
+    if secrets is not None:
+        logger.debug("Secrets loaded from local cache: %s", KV_CACHE_PATH)
+    else:
+        with _kv_refresh_lock():
+            # Another worker may have refreshed while we waited for the lock
+            secrets = _read_kv_cache(kv_name)
+            if secrets is None:
+                secrets = _fetch_kv_secrets(url)
+                logger.debug("Secrets loaded: %s", sorted(secrets))
+
+                # Only cache a complete set, so a transient failure is retried next start
+                if all(secrets.get(name) for name in KEYVAULT_SECRETS.values()):
+                    _write_kv_cache(kv_name, secrets)
+
+    values = {key: secrets.get(name) for key, name in KEYVAULT_SECRETS.items()}
+    if values.get("AZURE_OPENAI_ENDPOINT"):
+        values["AZURE_OPENAI_ENDPOINT"] = values["AZURE_OPENAI_ENDPOINT"].rstrip("/")
+    return values
+
+
+class LazyConfig(dict):
+    """
+    CONFIG dict whose Key Vault-backed keys resolve on first access.
+
+    Importing config costs nothing; the first lookup of any KV key loads
+    all of them in one go (cache file or one parallel KV fetch), since the
+    per-secret round-trips overlap and callers almost always need several.
+    Keys that come from the environment are plain dict entries.
+    """
+
+    def __init__(self, loader, lazy_keys):
+        super().__init__()
+        self._loader = loader
+        self._lazy_keys = frozenset(lazy_keys)
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self, key):
+        if self._loaded or key not in self._lazy_keys:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.update(self._loader())
+                self._loaded = True
+
+    def prefetch(self):
+        """
+        Resolve the KV-backed keys on a daemon thread, so the AAD token and
+        secret round-trips overlap the rest of app start-up instead of
+        landing on the first access. Callers that get there first simply
+        wait on the load lock.
+        """
+        def _run():
+            try:
+                self._ensure_loaded(next(iter(self._lazy_keys)))
+            except Exception as e:
+                logger.warning("KeyVault prefetch failed: %s", e)
+
+        threading.Thread(target=_run, name="kv-prefetch", daemon=True).start()
+
+    def __getitem__(self, key):
+        self._ensure_loaded(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self._ensure_loaded(key)
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        self._ensure_loaded(key)
+        return super().__contains__(key)
 
-    secrets = {}
-
-    try:
-        print("📥 Fetching list of secrets...")
-        props = list(client.list_properties_of_secrets())
-        print("FOUND SECRETS:", [p.name for p in props])
 
-        for p in props:
-            secrets[p.name] = client.get_secret(p.name).value
+if USE_KEYVAULT:
+    kv_name = os.getenv("KEYVAULT_NAME")
 
-    except Exception as e:
-        print("❌ ERROR while listing secrets:", e)
+    if not kv_name:
+        raise RuntimeError("❌ KEYVAULT_NAME is missing in .env")
 
-    print("📦 SECRETS LOADED:", secrets)
+    CONFIG = LazyConfig(lambda: _load_keyvault_config(kv_name), KEYVAULT_SECRETS)
 
-    CONFIG["AZURE_SPEECH_KEY"]        = secrets.get("azure-speech-key")
-    CONFIG["AZURE_SPEECH_REGION"]     = secrets.get("azure-speech-region")
-    CONFIG["AZURE_OPENAI_API_KEY"]    = secrets.get("azure-openai-api-key")
-    CONFIG["AZURE_OPENAI_ENDPOINT"]   = secrets.get("azure-openai-endpoint")
-    CONFIG["AZURE_OPENAI_DEPLOYMENT"] = secrets.get("azure-openai-deployment")
+    # Warm the AAD token + secrets in the background (KV_PREFETCH=0 to disable)
+    if os.getenv("KV_PREFETCH", "1") == "1":
+        CONFIG.prefetch()
 
 else:
+    CONFIG = {}
     CONFIG["AZURE_SPEECH_KEY"]        = os.getenv("AZURE_SPEECH_KEY")
     CONFIG["AZURE_SPEECH_REGION"]     = os.getenv("AZURE_SPEECH_REGION")
     CONFIG["AZURE_OPENAI_API_KEY"]     = os.getenv("AZURE_OPENAI_API_KEY")
     CONFIG["AZURE_OPENAI_ENDPOINT"]    = os.getenv("AZURE_OPENAI_ENDPOINT")
     CONFIG["AZURE_OPENAI_DEPLOYMENT"]  = os.getenv("AZURE_OPENAI_DEPLOYMENT")
 
-# ✅ REQUIRED FIX — Normalize endpoint
-if CONFIG.get("AZURE_OPENAI_ENDPOINT"):
-    CONFIG["AZURE_OPENAI_ENDPOINT"] = CONFIG["AZURE_OPENAI_ENDPOINT"].rstrip("/")
+    # ✅ REQUIRED FIX — Normalize endpoint
+    if CONFIG.get("AZURE_OPENAI_ENDPOINT"):
+        CONFIG["AZURE_OPENAI_ENDPOINT"] = CONFIG["AZURE_OPENAI_ENDPOINT"].rstrip("/")
 
 
 CONFIG["AZURE_OPENAI_CHAT_DEPLOYMENT"] = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT")
 CONFIG["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"] = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
 
-print("CONFIG LOADED:", CONFIG)
+logger.debug("CONFIG loaded (KeyVault=%s)", USE_KEYVAULT)
@@ -2,26 +2,75 @@
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 
 from app.gdd_engine.orchestrator.orchestrator import GDDOrchestrator
 from app.gdd_engine.docx_exporter import export_to_docx
 from app.gdd_engine.session_manager import SessionManager
 from app.gdd_engine.gdd_questions import QUESTIONS
 
-import uuid
-import os
-import tempfile
+import io
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 
 router = APIRouter()
 session_mgr = SessionManager()
 
+# QUESTIONS is a tuple — its length is fixed for the process lifetime
+_TOTAL = len(QUESTIONS)
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+# Rendered DOCX bytes keyed by markdown digest — repeated exports of an
+# unchanged GDD skip the python-docx build entirely
+DOCX_CACHE_SIZE = 128
+_docx_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_docx_cache_lock = threading.Lock()
+
+
+def _render_docx(markdown: str) -> bytes:
+    key = hashlib.blake2b(markdown.encode("utf-8"), digest_size=16).hexdigest()
+
+    with _docx_cache_lock:
+        data = _docx_cache.get(key)
+        if data is not None:
+            _docx_cache.move_to_end(key)
+            return data
+
+    buf = io.BytesIO()
+    export_to_docx(markdown, buf)
+    data = buf.getvalue()
+
+    with _docx_cache_lock:
+        _docx_cache[key] = data
+        _docx_cache.move_to_end(key)
+        while len(_docx_cache) > DOCX_CACHE_SIZE:
+            _docx_cache.popitem(last=False)
+    return data
+
+
+async def _docx_response(markdown: str, filename: str) -> Response:
+    """Render markdown to DOCX in memory and send it back — no temp file."""
+    # python-docx build is CPU-bound; keep it off the event loop
+    data = await asyncio.to_thread(_render_docx, markdown)
+    # bytes are already in memory: one body with a Content-Length
+    return Response(
+        content=data,
+        media_type=DOCX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # --------------------------------------------------------------------
 # Request models
 # --------------------------------------------------------------------
 class GDDRequest(BaseModel):
     concept: str
     pinned_notes: dict | None = None
+    council: bool = False   # one combined call for the five design sections
+    use_cache: bool = True  # False forces fresh LLM calls instead of cached replies
 
 class ExportRequest(BaseModel):
     markdown: str
@@ -46,8 +95,8 @@ class ExportBySessionRequest(BaseModel):
 @router.post("/api/orchestrate")
 async def orchestrate_gdd(payload: GDDRequest):
     try:
-        orchestrator = GDDOrchestrator(payload.concept)
-        results = orchestrator.run_pipeline()
+        orchestrator = GDDOrchestrator(payload.concept, council=payload.council, use_cache=payload.use_cache)
+        results = await orchestrator.run_pipeline()
 
         return {
             "status": "ok",
@@ -65,14 +114,7 @@ async def orchestrate_gdd(payload: GDDRequest):
 @router.post("/export-docx")
 async def export_docx(req: ExportRequest):
     try:
-        filename = f"gdd_{uuid.uuid4().hex}.docx"
-        out_path = os.path.join(tempfile.gettempdir(), filename)
-        export_to_docx(req.markdown, out_path)
-        return FileResponse(
-            out_path,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename="gdd_output.docx",
-        )
+        return await _docx_response(req.markdown, "gdd_output.docx")
     except Exception as e:
         raise HTTPException(500, str(e))
 
@@ -82,17 +124,19 @@ async def export_docx(req: ExportRequest):
 # --------------------------------------------------------------------
 @router.post("/start")
 async def gdd_start():
-    session_id = session_mgr.create_session()
-
-    session_mgr._store[session_id]["answers"] = []
-    session_mgr._store[session_id]["index"] = 0
+    # One slot per question up front — /answer just indexes into it
+    session_id = await session_mgr.start_session({
+        "answers": [{"question": q, "fragments": []} for q in QUESTIONS],
+        "index": 0,
+        "markdown": None,
+    })
 
     return {
         "status": "ok",
         "session_id": session_id,
         "question": QUESTIONS[0],
         "index": 0,
-        "total": len(QUESTIONS)
+        "total": _TOTAL
     }
 
 
@@ -102,27 +146,27 @@ async def gdd_start():
 @router.post("/next")
 async def gdd_next(req: NextRequest):
     session_id = req.session_id
-    if not session_mgr.session_exists(session_id):
-        raise HTTPException(404, "Session not found")
 
-    data = session_mgr._store[session_id]
-    index = data.get("index", 0)
-    total = len(QUESTIONS)
+    def advance(data):
+        index = data.get("index", 0)
+        if index < _TOTAL:
+            data["index"] = index + 1
+        return index
+
+    try:
+        index = await session_mgr.update(session_id, advance, fields=("index",))
+    except KeyError:
+        raise HTTPException(404, "Session not found")
 
     # End of list → wizard completed
-    if index >= total:
+    if index >= _TOTAL:
         return {"status": "done"}
 
-    question = QUESTIONS[index]
-
-    # Advance pointer
-    data["index"] = index + 1
-
     return {
         "status": "ok",
-        "question": question,
+        "question": QUESTIONS[index],
         "index": index,
-        "total": total
+        "total": _TOTAL
     }
 
 
@@ -132,37 +176,26 @@ async def gdd_next(req: NextRequest):
 @router.post("/answer")
 async def gdd_answer(payload: AnswerInput):
     session_id = payload.session_id
-    if not session_mgr.session_exists(session_id):
-        raise HTTPException(404, "Session not found")
-
     raw = payload.answer.strip()
-    data = session_mgr._store[session_id]
-
-    index = data.get("index", 0)
-    total = len(QUESTIONS)
-
-    # If user answers after wizard finished
-    if index == 0:
-        q_index = 0
-    else:
-        q_index = index - 1
 
-    if q_index >= total:
-        return {"status": "done"}
-
-    answers = data.get("answers", [])
+    def record(data):
+        # Answers belong to the question last served by /next
+        # (or the first one if /next hasn't been called yet)
+        q_index = max(data.get("index", 0) - 1, 0)
 
-    # Ensure structure
-    while len(answers) <= q_index:
-        answers.append({"question": QUESTIONS[len(answers)], "answer": ""})
+        # Keep utterances as fragments; joined once at /finish (no O(n²) re-copying)
+        if raw and q_index < _TOTAL:
+            data["answers"][q_index]["fragments"].append(raw)
+        return q_index
 
-    # Append or overwrite cleanly
-    if answers[q_index]["answer"]:
-        answers[q_index]["answer"] += "\n" + raw
-    else:
-        answers[q_index]["answer"] = raw
+    try:
+        q_index = await session_mgr.update(session_id, record, fields=("answers",))
+    except KeyError:
+        raise HTTPException(404, "Session not found")
 
-    data["answers"] = answers
+    # If user answers after wizard finished
+    if q_index >= _TOTAL:
+        return {"status": "done"}
 
     return {"status": "ok", "recorded_for": q_index}
 
@@ -173,17 +206,16 @@ async def gdd_answer(payload: AnswerInput):
 @router.post("/finish")
 async def gdd_finish(payload: FinishInput):
     session_id = payload.session_id
-    if not session_mgr.session_exists(session_id):
+    data = await session_mgr.load(session_id)
+    if data is None:
         raise HTTPException(404, "Session not found")
-
-    data = session_mgr._store[session_id]
     answers = data.get("answers", [])
 
     # ---------- FIXED KEY ERROR ----------
     concept_parts = []
     for qa in answers:
         q = qa.get("question")
-        a = qa.get("answer", "").strip()
+        a = "\n".join(qa.get("fragments", ())).strip()
         if not q or not a:
             continue
         concept_parts.append(f"{q}\n{a}")
@@ -193,10 +225,10 @@ async def gdd_finish(payload: FinishInput):
         concept = "No meaningful answers were provided."
 
     orchestrator = GDDOrchestrator(concept)
-    results = orchestrator.run_pipeline()
+    results = await orchestrator.run_pipeline()
 
     markdown = results["integration"]["markdown"]
-    data["markdown"] = markdown
+    await session_mgr.set_markdown(session_id, markdown)
 
     return {
         "status": "ok",
@@ -214,22 +246,15 @@ async def gdd_finish(payload: FinishInput):
 @router.post("/export-by-session")
 async def gdd_export_session(payload: ExportBySessionRequest):
     session_id = payload.session_id
-    if not session_mgr.session_exists(session_id):
+    try:
+        markdown = await session_mgr.get_markdown(session_id)
+    except KeyError:
         raise HTTPException(404, "Session not found")
 
-    markdown = session_mgr._store[session_id].get("markdown")
     if not markdown:
         raise HTTPException(400, "GDD not generated yet.")
 
-    filename = f"gdd_{uuid.uuid4().hex}.docx"
-    out_path = os.path.join(tempfile.gettempdir(), filename)
-    export_to_docx(markdown, out_path)
-
-    return FileResponse(
-        out_path,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        filename="Game_Design_Document.docx"
-    )
+    return await _docx_response(markdown, "Game_Design_Document.docx")
 
 
 # --------------------------------------------------------------------
@@ -241,18 +266,12 @@ async def export_gdd(payload: dict):
     if not session_id:
         raise HTTPException(400, "Missing session_id")
 
-    if not session_mgr.session_exists(session_id):
+    try:
+        markdown = await session_mgr.get_markdown(session_id)
+    except KeyError:
         raise HTTPException(404, "Invalid session_id")
 
-    markdown = session_mgr._store[session_id].get("markdown")
     if not markdown:
         raise HTTPException(400, "No generated markdown. Say 'Finish GDD' first.")
 
-    tmp_path = os.path.join(tempfile.gettempdir(), f"GDD_{session_id}.docx")
-    export_to_docx(markdown, tmp_path)
-
-    return FileResponse(
-        tmp_path,
-        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        filename=f"GDD_{session_id}.docx"
-    )
+    return await _docx_response(markdown, f"GDD_{session_id}.docx")
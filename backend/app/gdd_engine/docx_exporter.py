@@ -5,8 +5,65 @@ Converts generated markdown into a DOCX document.
 
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from xml.sax.saxutils import escape
 import re
 
+# Inline **bold** spans, compiled once for the per-line loop
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+
+# Style IDs of the default python-docx template ("Heading 1" → Heading1, ...)
+_HEADING_STYLES = {1: "Heading1", 2: "Heading2", 3: "Heading3"}
+_BULLET_STYLE = "ListBullet"
+
+# Line marker (up to and including the first space) → paragraph style
+_PREFIX_STYLES = {
+    "# ": _HEADING_STYLES[1],
+    "## ": _HEADING_STYLES[2],
+    "### ": _HEADING_STYLES[3],
+    "- ": _BULLET_STYLE,
+    "• ": _BULLET_STYLE,
+}
+
+_EMPTY_P = "<w:p/>"
+
+
+def _run_xml(text: str, bold: bool = False) -> str:
+    rpr = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _paragraph_xml(runs: str, style: str = None) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{ppr}{runs}</w:p>"
+
+
+def _text_paragraph_xml(text: str, style: str = None) -> str:
+    return _paragraph_xml(_run_xml(text) if text else "", style)
+
+
+def _bold_paragraph_xml(line: str, bold_matches) -> str:
+    runs = []
+    last_index = 0
+
+    for match in bold_matches:
+        start, end = match.span()
+        # Add normal text before the bold part
+        if start > last_index:
+            runs.append(_run_xml(line[last_index:start]))
+
+        # Add bold text
+        runs.append(_run_xml(match.group(1), bold=True))
+
+        last_index = end
+
+    # Add remaining text
+    if last_index < len(line):
+        runs.append(_run_xml(line[last_index:]))
+
+    return _paragraph_xml("".join(runs))
+
 
 def add_markdown_to_doc(doc: Document, markdown: str):
     """
@@ -15,75 +72,60 @@ def add_markdown_to_doc(doc: Document, markdown: str):
         # Heading 1
         ## Heading 2
         ### Heading 3
-        - Bullet points
+        - Bullet points (or •)
         **bold**
         plain text
+
+    Paragraph XML is built as one string and parsed once, then spliced
+    into the body — no per-line python-docx object construction.
     """
 
-    lines = markdown.split("\n")
+    parts = []
 
-    for line in lines:
+    for line in markdown.splitlines():
         line = line.rstrip()
 
-        # Heading 1
-        if line.startswith("# "):
-            p = doc.add_heading(line[2:], level=1)
-            continue
-
-        # Heading 2
-        if line.startswith("## "):
-            p = doc.add_heading(line[3:], level=2)
-            continue
-
-        # Heading 3
-        if line.startswith("### "):
-            p = doc.add_heading(line[4:], level=3)
-            continue
-
-        # Bullet list
-        if line.startswith("- "):
-            p = doc.add_paragraph(line[2:], style="List Bullet")
-            continue
-
-        # Empty line
-        if line.strip() == "":
-            doc.add_paragraph("")
+        # Headings / bullets: one dict lookup on the marker before the first space
+        space = line.find(" ")
+        if space > 0:
+            style = _PREFIX_STYLES.get(line[:space + 1])
+            if style is not None:
+                parts.append(_text_paragraph_xml(line[space + 1:], style))
+                continue
+
+        # Empty line (already right-stripped)
+        if not line:
+            parts.append(_EMPTY_P)
             continue
 
         # Bold text formatting
-        bold_matches = list(re.finditer(r"\*\*(.*?)\*\*", line))
+        bold_matches = list(_BOLD_RE.finditer(line))
         if bold_matches:
-            p = doc.add_paragraph()
-            last_index = 0
-
-            for match in bold_matches:
-                start, end = match.span()
-                # Add normal text before the bold part
-                if start > last_index:
-                    p.add_run(line[last_index:start])
-
-                # Add bold text
-                bold_text = match.group(1)
-                p.add_run(bold_text).bold = True
-
-                last_index = end
-
-            # Add remaining text
-            if last_index < len(line):
-                p.add_run(line[last_index:])
-
+            parts.append(_bold_paragraph_xml(line, bold_matches))
             continue
 
         # Normal paragraph
-        doc.add_paragraph(line)
+        parts.append(_text_paragraph_xml(line))
+
+    fragment = parse_xml(f"<w:body {nsdecls('w')}>{''.join(parts)}</w:body>")
+
+    # Paragraphs must precede the trailing section properties
+    body = doc.element.body
+    sect_pr = body.find(qn("w:sectPr"))
+    for p in list(fragment):
+        if sect_pr is not None:
+            sect_pr.addprevious(p)
+        else:
+            body.append(p)
 
 
-def export_to_docx(markdown: str, output_path: str) -> str:
+def export_to_docx(markdown: str, output_path):
     """
     Creates a DOCX file from markdown content.
 
     :param markdown: GDD markdown content
     :param output_path: Full path to save (e.g., '/tmp/gdd_output.docx')
+                        or a writable binary file-like (e.g., io.BytesIO)
     :return: output_path
     """
     doc = Document()
@@ -1,11 +1,11 @@
 # backend/app/gdd_engine/gdd_questions.py
 """
-Ordered list of short, high-leverage questions
+Ordered, immutable sequence of short, high-leverage questions
 for guided Game Design Document creation.
 """
 
 
-QUESTIONS = [
+QUESTIONS = (
     # 1 — High-level vision
     "What is the core fantasy or big idea of your game?",
 
@@ -47,4 +47,4 @@ QUESTIONS = [
 
     # Final
     "Is there anything else that is important for the design team to know?"
-]
+)
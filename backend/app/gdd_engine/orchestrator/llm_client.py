@@ -1,8 +1,20 @@
 import os
 import sys
 import json
+import logging
+import random
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+import httpx
 from azure.core.credentials import AzureKeyCredential
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, RateLimitError, APITimeoutError, APIConnectionError
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:   # Redis is optional; the in-process LRU still applies
+    aioredis = None
 
 
 # ============================================================
@@ -19,6 +31,9 @@ if APP_DIR not in sys.path:
 from config import CONFIG   # now this import works reliably
 
 
+logger = logging.getLogger(__name__)
+
+
 # ============================================================
 # 🔐 Azure OpenAI Setup
 # ============================================================
@@ -30,45 +45,195 @@ AZURE_OPENAI_CHAT_DEPLOYMENT = CONFIG.get("AZURE_OPENAI_CHAT_DEPLOYMENT")
 if not AZURE_OPENAI_KEY or not AZURE_OPENAI_ENDPOINT:
     raise RuntimeError("❌ Azure OpenAI credentials missing from CONFIG")
 
-client = AzureOpenAI(
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+# Non-streaming: nothing arrives until the whole persona JSON is generated,
+# so the read timeout has to cover the longest (integration) call
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "600"))
+
+# Long-lived pooled HTTP/2 transport: concurrent persona calls multiplex over
+# one kept-alive TLS connection instead of each paying TCP + TLS setup
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=LLM_CONCURRENCY, max_keepalive_connections=20, keepalive_expiry=120),
+    timeout=httpx.Timeout(LLM_TIMEOUT, connect=5.0),
+)
+
+client = AsyncAzureOpenAI(
     azure_endpoint=AZURE_OPENAI_ENDPOINT,
     api_key=AZURE_OPENAI_KEY,
-    api_version="2024-08-01-preview"
+    api_version="2024-08-01-preview",
+    http_client=http_client,
+    # _create_completion owns retries; SDK retries would multiply attempts and
+    # sleep their backoff while holding an _llm_slots permit
+    max_retries=0,
 )
 
 
-def call_llm(system_prompt: str, user_prompt: str) -> str:
+async def warmup() -> None:
+    """
+    Prime the pool: one cheap request opens the HTTP/2 connection (TCP + TLS)
+    so the first real persona call of this worker doesn't pay for it.
+    Failures are logged and ignored — the next real call just connects cold.
+    """
+    try:
+        await client.models.list()
+        logger.info("Azure OpenAI connection warmed up")
+    except Exception as e:
+        logger.warning("Azure OpenAI warmup failed: %s", e)
 
-    print("\n=== CALLING AZURE OPENAI ===")
-    print("System:", system_prompt[:200], "...")
-    print("User:", user_prompt[:200], "...")
 
-    response = client.chat.completions.create(
-        model=AZURE_OPENAI_CHAT_DEPLOYMENT,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        temperature=0.2
-    )
+# ============================================================
+# 🚦 Admission control — bound in-flight calls, back off on 429
+# ============================================================
 
-    print("\n=== RAW FULL RESPONSE OBJECT TYPE ===")
-    print(type(response))
+# Process-wide: parallel persona stages and concurrent sessions share it
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+_RETRYABLE = (RateLimitError, APITimeoutError, APIConnectionError)
+
+
+async def _create_completion(messages):
+    """
+    Chat completion under the concurrency bound, retried with exponential
+    backoff + full jitter on rate limits and transient network errors.
+    """
+    attempt = 0
+    while True:
+        try:
+            async with _llm_slots:
+                return await client.chat.completions.create(
+                    model=AZURE_OPENAI_CHAT_DEPLOYMENT,
+                    messages=messages,
+                    temperature=0.2
+                )
+        except _RETRYABLE as e:
+            attempt += 1
+            if attempt >= LLM_MAX_ATTEMPTS:
+                raise
+            # Sleep outside the semaphore so waiting callers can proceed
+            wait = random.uniform(0, min(30.0, 2 ** attempt))
+            logger.warning("Azure OpenAI %s (attempt %d/%d). Sleeping %.1fs...",
+                           type(e).__name__, attempt, LLM_MAX_ATTEMPTS, wait)
+            await asyncio.sleep(wait)
 
-    print("\n=== RAW CHOICE TYPE ===")
-    print(type(response.choices[0]))
 
-    print("\n=== RAW MESSAGE TYPE ===")
-    print(type(response.choices[0].message))
+# ============================================================
+# 🧠 Response cache — repeated persona calls skip Azure
+# ============================================================
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_KEY = "llm:{}"
+
+# Shared second tier: with REDIS_URL set, reruns hit the cache across
+# workers and restarts, not just within one process
+_REDIS_URL = os.getenv("REDIS_URL")
+_redis = aioredis.from_url(_REDIS_URL) if (_REDIS_URL and aioredis is not None) else None
+
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(system_prompt: str, user_prompt: str) -> str:
+    """
+    Whitespace-insensitive key: prompts that only differ in formatting
+    (indentation, trailing newlines) share one cache entry.
+    """
+    normalized = " ".join(system_prompt.split()) + "\x1f" + " ".join(user_prompt.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str):
+    with _cache_lock:
+        value = _response_cache.get(key)
+        if value is not None:
+            _response_cache.move_to_end(key)
+        return value
+
+
+def _cache_pop(key: str) -> None:
+    with _cache_lock:
+        _response_cache.pop(key, None)
+
+
+def _cache_put(key: str, value: str) -> None:
+    with _cache_lock:
+        _response_cache[key] = value
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > LLM_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+async def _redis_get(key: str):
+    if _redis is None:
+        return None
+    try:
+        value = await _redis.get(LLM_CACHE_KEY.format(key))
+    except Exception as e:   # a cache outage must not fail the LLM call
+        logger.warning("LLM cache read failed: %s", e)
+        return None
+    return value.decode("utf-8") if value is not None else None
+
+
+async def _redis_put(key: str, value: str) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.setex(LLM_CACHE_KEY.format(key), LLM_CACHE_TTL, value.encode("utf-8"))
+    except Exception as e:
+        logger.warning("LLM cache write failed: %s", e)
+
+
+async def _redis_delete(key: str) -> None:
+    if _redis is None:
+        return
+    try:
+        await _redis.delete(LLM_CACHE_KEY.format(key))
+    except Exception as e:
+        logger.warning("LLM cache delete failed: %s", e)
+
+
+async def call_llm(system_prompt: str, user_prompt: str, use_cache: bool = True) -> str:
+    """
+    Cached chat completion. Only cache *reads* happen here: a reply is
+    written back by the caller via cache_llm_response once it has been
+    validated, so a malformed reply is retried against Azure next time
+    instead of being replayed from the cache.
+    use_cache=False skips the lookup and always calls Azure.
+    """
+    if use_cache:
+        key = _cache_key(system_prompt, user_prompt)
+        cached = _cache_get(key)
+        if cached is None:
+            cached = await _redis_get(key)
+            if cached is not None:
+                _cache_put(key, cached)
+        if cached is not None:
+            logger.debug("Azure OpenAI cache hit")
+            return cached
+
+    logger.debug("Calling Azure OpenAI: system=%.200s... user=%.200s...", system_prompt, user_prompt)
+
+    response = await _create_completion([
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ])
 
-    print("\n=== RAW MESSAGE.CONTENT TYPE ===")
-    print(type(response.choices[0].message.content))
+    return response.choices[0].message.content
 
-    print("\n=== RAW MESSAGE.CONTENT VALUE ===")
-    print(response.choices[0].message.content)
 
-    print("\n=== repr(MESSAGE.CONTENT) ===")
-    print(repr(response.choices[0].message.content))
+async def cache_llm_response(system_prompt: str, user_prompt: str, content: str) -> None:
+    """Store a validated reply for (system_prompt, user_prompt) in both cache tiers."""
+    if not content:
+        return
+    key = _cache_key(system_prompt, user_prompt)
+    _cache_put(key, content)
+    await _redis_put(key, content)
 
-    # Temporarily return empty to avoid validation
-    return response.choices[0].message.content
+
+async def evict_llm_response(system_prompt: str, user_prompt: str) -> None:
+    """Drop any cached reply for (system_prompt, user_prompt) from both tiers."""
+    key = _cache_key(system_prompt, user_prompt)
+    _cache_pop(key)
+    await _redis_delete(key)
@@ -9,12 +9,14 @@ Improved GDD orchestrator:
 """
 
 import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+import orjson
+from typing import Dict, Any, List, Optional, Tuple
 
-from .persona_router import load_persona, load_prompt, load_schema
-from .llm_client import call_llm
-from .validator import validate_json
+from .persona_router import load_persona, load_prompt, load_schema_obj
+from .llm_client import call_llm, cache_llm_response, evict_llm_response
+from .validator import validate_json, validate_data, clean_json_string, compile_schema, SchemaValidator
 
 # Optional RAG client import. If not present, we'll gracefully continue.
 try:
@@ -23,7 +25,6 @@ except Exception:
     rag_retrieve = None  # type: ignore
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
 # PERSONA MAP must match the prompt / persona / schema filenames in your repo
@@ -66,20 +67,111 @@ PERSONA_MAP = {
 }
 
 
+# Which fields of each upstream output a persona actually reads. Upstream keys
+# mapped to None are passed whole; upstreams not listed (and non-persona keys
+# such as answers / kb_snippets / notes) pass through untouched. Keeps the deep
+# end of the chain from re-sending every earlier output in full.
+CONTEXT_NEEDS: Dict[str, Dict[str, Optional[List[str]]]] = {
+    "lead": {"director": ["vision", "pillars", "must_haves", "kill_criteria"]},
+    "systems": {
+        "director": ["vision", "pillars", "must_haves"],
+        "lead": ["core_loop", "session_flow"],
+    },
+    "ux": {
+        "director": ["vision", "pillars"],
+        "lead": ["core_loop", "session_flow", "onboarding_milestones"],
+        "systems": ["systems"],
+    },
+    "pm": {
+        "director": ["vision", "pillars", "kill_criteria"],
+        "lead": ["core_loop", "session_flow"],
+        "systems": ["systems"],
+    },
+    # the reviewer checks the integrated GDD itself, so it keeps the markdown
+    # alongside the conflicts the integration step flagged
+    "reviewer": {"integration": ["markdown", "conflicts"]},
+}
+
+
+def project_context(persona_name: str, extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Trim upstream persona outputs in `extra` down to CONTEXT_NEEDS[persona_name]."""
+    needs = CONTEXT_NEEDS.get(persona_name)
+    if not needs:
+        return extra
+    projected = {}
+    for key, value in extra.items():
+        fields = needs.get(key)
+        if fields is not None and isinstance(value, dict):
+            value = {f: value[f] for f in fields if f in value}
+        projected[key] = value
+    return projected
+
+
+def _system_message(persona_name: str) -> str:
+    """
+    Static persona card + instructions for a persona.
+    Built once so every call sends byte-identical text first, which is what
+    lets the endpoint reuse its prompt (KV) cache for the shared prefix.
+    """
+    filenames = PERSONA_MAP[persona_name]
+    persona_card = load_persona(filenames["persona"])
+    persona_prompt_text = load_prompt(filenames["prompt"])
+    return (
+        f"PERSONA_CARD:\n{json.dumps(persona_card, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        f"{persona_prompt_text}"
+    )
+
+
+# persona key -> (system message, compiled schema validator), built once at
+# import so a pipeline run touches no files and compiles no schemas
+_PERSONA_RESOURCES: Dict[str, Tuple[str, SchemaValidator]] = {
+    name: (_system_message(name), compile_schema(load_schema_obj(files["schema"])))
+    for name, files in PERSONA_MAP.items()
+}
+
+
+# Design personas that council mode answers in one combined call
+COUNCIL_PERSONAS = ["director", "lead", "systems", "ux", "pm"]
+
+_COUNCIL_INSTRUCTIONS = (
+    "You are a design council made up of the roles below. Work through them in order; "
+    "each role builds on the roles before it, exactly as if it had read their output.\n"
+    "Return ONE JSON object with exactly these top-level keys: {keys}. "
+    "The value under each key must follow that role's own output format and rules. "
+    "Return JSON only — no prose, no code fences."
+)
+
+# All council persona cards + prompts, labelled by role
+_COUNCIL_SYSTEM_MESSAGE = "\n\n".join(
+    [_COUNCIL_INSTRUCTIONS.format(keys=", ".join(COUNCIL_PERSONAS))]
+    + [f"===== ROLE: {name} =====\n{_PERSONA_RESOURCES[name][0]}" for name in COUNCIL_PERSONAS]
+)
+
+
+def _dumps(obj: Any) -> str:
+    """Compact UTF-8 JSON for prompt context; orjson is ~10x faster than json.dumps."""
+    return orjson.dumps(obj).decode()
+
+
 class GDDOrchestrator:
     """
     Orchestrator coordinates persona runs and assembles the final GDD.
     """
 
-    def __init__(self, concept: str, answers: Optional[Dict[str, Any]] = None, use_rag: bool = True):
+    def __init__(self, concept: str, answers: Optional[Dict[str, Any]] = None, use_rag: bool = True, council: bool = False, use_cache: bool = True):
         """
         :param concept: short concept/title of the game
         :param answers: dict of user answers collected by the GDD wizard (optional)
         :param use_rag: whether to attempt RAG retrieval (falls back if rag_client missing)
+        :param council: produce the five design sections in one combined LLM call
+                        (falls back to the per-persona chain if that output doesn't validate)
+        :param use_cache: reuse cached LLM replies; False forces fresh calls (and refreshes the cache)
         """
         self.concept = concept
         self.answers = answers or {}
         self.use_rag = use_rag and (rag_retrieve is not None)
+        self.council = council
+        self.use_cache = use_cache
         self.kb_snippets = []
         self.outputs: Dict[str, Any] = {}
 
@@ -96,7 +188,7 @@ class GDDOrchestrator:
             return []
 
         try:
-            query_text = self.concept + "\n\n" + json.dumps(self.answers, ensure_ascii=False)
+            query_text = self.concept + "\n\n" + _dumps(self.answers)
             snippets = rag_retrieve(query_text, top_k=8)  # rag_retrieve should return list[str]
             if isinstance(snippets, list):
                 self.kb_snippets = snippets
@@ -113,26 +205,20 @@ class GDDOrchestrator:
     # ---------------------------
     # Core persona runner
     # ---------------------------
-    def run_persona(self, persona_name: str, extra_context: str = "") -> Any:
+    async def run_persona(self, persona_name: str, extra_context: Any = "") -> Any:
         """
         Run a persona using PERSONA_MAP configuration.
         :param persona_name: key in PERSONA_MAP e.g., 'director', 'lead'
-        :param extra_context: optional JSON string or free text passed to the prompt
+        :param extra_context: optional dict (embedded as-is) or free text passed to the prompt
         :return: validated JSON-like dict output (as returned by validate_json)
         """
-        if persona_name not in PERSONA_MAP:
+        resources = _PERSONA_RESOURCES.get(persona_name)
+        if resources is None:
             raise ValueError(f"Unknown persona '{persona_name}'")
+        system_msg, validator = resources
 
-        filenames = PERSONA_MAP[persona_name]
-        persona_file = filenames["persona"]
-        prompt_file = filenames["prompt"]
-        schema_file = filenames["schema"]
-
-        persona_card = load_persona(persona_file)
-        persona_prompt_text = load_prompt(prompt_file)
-        schema_path = load_schema(schema_file)
-
-        system_msg = f"PERSONA_CARD:\n{json.dumps(persona_card, indent=2)}"
+        if isinstance(extra_context, dict):
+            extra_context = project_context(persona_name, extra_context)
 
         # Build the user message. Include concept, answers, kb_snippets, plus any extra context
         user_payload = {
@@ -142,51 +228,118 @@ class GDDOrchestrator:
             "extra": extra_context
         }
 
-        user_msg = (
-            f"Context:\n{json.dumps(user_payload, ensure_ascii=False, indent=2)}\n\n"
-            f"{persona_prompt_text}"
-        )
+        user_msg = f"Context:\n{_dumps(user_payload)}"
 
         logger.info("Calling LLM for persona '%s'...", persona_name)
-        raw_output = call_llm(system_msg, user_msg)
+        raw_output = await call_llm(system_msg, user_msg, use_cache=self.use_cache)
 
         # Validate JSON output using the persona schema
-        valid, result = validate_json(raw_output, schema_path)
+        valid, result = validate_json(raw_output, validator)
         if not valid:
+            # never let a bad reply (cached or fresh) answer the next retry
+            await evict_llm_response(system_msg, user_msg)
             # include debug info and raise to bubble up to caller
             logger.error("Invalid JSON output from persona '%s': %s", persona_name, result)
             raise Exception(f"[INVALID JSON OUTPUT from {persona_name}] → {result}")
 
+        await cache_llm_response(system_msg, user_msg, raw_output)
+
         # Store & return
         self.outputs[persona_name] = result
         logger.info("Persona '%s' completed successfully.", persona_name)
         return result
 
     # ---------------------------
-    # Pipeline run
+    # Council run: five design personas, one LLM call
     # ---------------------------
-    def run_pipeline(self) -> Dict[str, Any]:
+    async def run_council(self) -> Dict[str, Any]:
         """
-        Execute the full multi-persona pipeline in intended order and then run integration persona.
-        Returns dict with all persona outputs & integration_markdown.
+        Ask for director/lead/systems/ux/pm in a single request and validate
+        each slice against its own persona schema.
         """
-        # 1) fetch RAG context (optional)
-        self.fetch_rag_context()
+        user_payload = {
+            "concept": self.concept,
+            "answers": self.answers,
+            "kb_snippets": self.kb_snippets,
+        }
+        user_msg = f"Context:\n{_dumps(user_payload)}"
 
+        logger.info("Calling LLM for design council %s...", COUNCIL_PERSONAS)
+        raw_output = await call_llm(_COUNCIL_SYSTEM_MESSAGE, user_msg, use_cache=self.use_cache)
+
+        try:
+            results = self._split_council(raw_output)
+        except Exception:
+            await evict_llm_response(_COUNCIL_SYSTEM_MESSAGE, user_msg)
+            raise
+
+        await cache_llm_response(_COUNCIL_SYSTEM_MESSAGE, user_msg, raw_output)
+
+        self.outputs.update(results)
+        logger.info("Design council completed successfully.")
+        return results
+
+    @staticmethod
+    def _split_council(raw_output: str) -> Dict[str, Any]:
+        """Parse a council reply and validate each persona slice against its schema."""
+        try:
+            bundle = json.loads(clean_json_string(raw_output))
+        except ValueError as e:
+            raise Exception(f"[INVALID JSON OUTPUT from council] → {e}")
+        if not isinstance(bundle, dict):
+            raise Exception("[INVALID JSON OUTPUT from council] → top level is not an object")
+
+        results: Dict[str, Any] = {}
+        for persona_name in COUNCIL_PERSONAS:
+            validator = _PERSONA_RESOURCES[persona_name][1]
+            valid, result = validate_data(bundle.get(persona_name), validator)
+            if not valid:
+                raise Exception(f"[INVALID JSON OUTPUT from council/{persona_name}] → {result}")
+            results[persona_name] = result
+        return results
+
+    async def _run_design_chain(self) -> Dict[str, Any]:
+        """Director → lead → systems → ux → pm, one LLM call per persona."""
         # 2) run director
-        director = self.run_persona("director")
+        director = await self.run_persona("director")
 
         # 3) run lead with director context
-        lead = self.run_persona("lead", extra_context=json.dumps({"director": director}, ensure_ascii=False))
+        lead = await self.run_persona("lead", extra_context={"director": director})
 
         # 4) systems (pass director + lead)
-        systems = self.run_persona("systems", extra_context=json.dumps({"director": director, "lead": lead}, ensure_ascii=False))
+        systems = await self.run_persona("systems", extra_context={"director": director, "lead": lead})
 
         # 5) ux
-        ux = self.run_persona("ux", extra_context=json.dumps({"director": director, "lead": lead, "systems": systems}, ensure_ascii=False))
+        ux = await self.run_persona("ux", extra_context={"director": director, "lead": lead, "systems": systems})
+
+        # 6) pm reads ux too — its prompt aligns PM choices with design + UX
+        pm = await self.run_persona("pm", extra_context={"director": director, "lead": lead, "systems": systems, "ux": ux})
+
+        return {"director": director, "lead": lead, "systems": systems, "ux": ux, "pm": pm}
+
+    # ---------------------------
+    # Pipeline run
+    # ---------------------------
+    async def run_pipeline(self) -> Dict[str, Any]:
+        """
+        Execute the full multi-persona pipeline in intended order and then run integration persona.
+        Returns dict with all persona outputs & integration_markdown.
+        """
+        # 1) fetch RAG context (optional)
+        self.fetch_rag_context()
+
+        # 2-6) design sections: one council call, or the per-persona chain
+        design = None
+        if self.council:
+            try:
+                design = await self.run_council()
+            except Exception as e:
+                logger.warning("Council call failed, falling back to per-persona chain: %s", e)
+
+        if design is None:
+            design = await self._run_design_chain()
 
-        # 6) pm (pass director, lead, systems, ux)
-        pm = self.run_persona("pm", extra_context=json.dumps({"director": director, "lead": lead, "systems": systems, "ux": ux}, ensure_ascii=False))
+        director, lead, systems, ux, pm = (design[p] for p in COUNCIL_PERSONAS)
 
         # 7) run integration agent (pass everything + user answers + kb)
         integration_input = {
@@ -199,18 +352,18 @@ class GDDOrchestrator:
             "kb_snippets": self.kb_snippets
         }
 
-        integration = self.run_persona("integration", extra_context=json.dumps(integration_input, ensure_ascii=False))
+        integration = await self.run_persona("integration", extra_context=integration_input)
 
         # 8) optional reviewer
         try:
-            reviewer = self.run_persona("reviewer", extra_context=json.dumps({
+            reviewer = await self.run_persona("reviewer", extra_context={
                 "director": director,
                 "lead": lead,
                 "systems": systems,
                 "ux": ux,
                 "pm": pm,
                 "integration": integration
-            }, ensure_ascii=False))
+            })
         except Exception as e:
             logger.warning("Reviewer persona failed: %s", e)
             reviewer = {"warning": "reviewer failed", "error": str(e)}
@@ -232,7 +385,7 @@ class GDDOrchestrator:
     # ---------------------------
     # Utility: refine a specific section
     # ---------------------------
-    def refine_section(self, section_persona: str, notes: str, base_context: Optional[Dict[str, Any]] = None) -> Any:
+    async def refine_section(self, section_persona: str, notes: str, base_context: Optional[Dict[str, Any]] = None) -> Any:
         """
         Run a single persona to refine a section of the GDD.
         :param section_persona: persona key (e.g., 'systems' or 'ux' or 'lead')
@@ -245,30 +398,32 @@ class GDDOrchestrator:
             "answers": self.answers,
             "kb_snippets": self.kb_snippets
         }
-        return self.run_persona(section_persona, extra_context=json.dumps(extra, ensure_ascii=False))
+        return await self.run_persona(section_persona, extra_context=extra)
 
     # ---------------------------
     # Small helper: quick orchestration entry (static)
     # ---------------------------
     @classmethod
-    def orchestrate(cls, concept: str, answers: Optional[Dict[str, Any]] = None, use_rag: bool = True) -> Dict[str, Any]:
+    async def orchestrate(cls, concept: str, answers: Optional[Dict[str, Any]] = None, use_rag: bool = True, council: bool = False, use_cache: bool = True) -> Dict[str, Any]:
         """
         Convenience method used by your API handler.
         """
-        orchestrator = cls(concept, answers=answers, use_rag=use_rag)
-        return orchestrator.run_pipeline()
+        orchestrator = cls(concept, answers=answers, use_rag=use_rag, council=council, use_cache=use_cache)
+        return await orchestrator.run_pipeline()
 
 
 # If invoked directly for quick manual testing:
 if __name__ == "__main__":
     import argparse
+    logging.basicConfig(level=logging.INFO)
     parser = argparse.ArgumentParser()
     parser.add_argument("--concept", required=True)
     parser.add_argument("--answers", default="{}")
+    parser.add_argument("--council", action="store_true")
     args = parser.parse_args()
 
     answers = json.loads(args.answers)
-    orch = GDDOrchestrator(args.concept, answers=answers, use_rag=False)
-    result = orch.run_pipeline()
-    print(json.dumps(result.keys(), indent=2))
+    orch = GDDOrchestrator(args.concept, answers=answers, use_rag=False, council=args.council)
+    result = asyncio.run(orch.run_pipeline())
+    print(json.dumps(list(result), indent=2))
 
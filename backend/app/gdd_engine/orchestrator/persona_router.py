@@ -1,5 +1,6 @@
 import json
 import os
+from functools import lru_cache
 
 BASE_PATH = os.path.dirname(os.path.dirname(__file__))
 PERSONA_DIR = os.path.join(BASE_PATH, "personas")
@@ -7,6 +8,10 @@ PROMPT_DIR = os.path.join(BASE_PATH, "prompts")
 SCHEMA_DIR = os.path.join(BASE_PATH, "schemas")
 
 
+# Persona / prompt / schema files are static, so each is read and parsed once
+# per process. Returned objects are shared — treat them as read-only.
+
+@lru_cache(maxsize=None)
 def load_persona(name: str) -> dict:
     """
     Load persona JSON from personas/<name>.json
@@ -16,6 +21,7 @@ def load_persona(name: str) -> dict:
         return json.load(f)
 
 
+@lru_cache(maxsize=None)
 def load_prompt(name: str) -> str:
     """
     Load prompt text from prompts/<name>_prompt.txt
@@ -30,3 +36,12 @@ def load_schema(name: str) -> str:
     Return absolute path to schemas/<name>_schema.json
     """
     return os.path.join(SCHEMA_DIR, f"{name}_schema.json")
+
+
+@lru_cache(maxsize=None)
+def load_schema_obj(name: str) -> dict:
+    """
+    Load and parse schemas/<name>_schema.json (UTF-8 — critical for Windows)
+    """
+    with open(load_schema(name), "r", encoding="utf-8") as f:
+        return json.load(f)
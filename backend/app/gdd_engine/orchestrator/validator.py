@@ -1,6 +1,25 @@
 import json
-import jsonschema
+import logging
 import re
+from typing import Any, Callable
+
+import fastjsonschema
+from json.decoder import scanstring
+
+logger = logging.getLogger(__name__)
+
+
+# Integration output puts "markdown" first (see integration_prompt.txt), so the
+# special-case check only needs to look at the head of the payload instead of
+# scanning a multi-KB document.
+MARKDOWN_PROBE_CHARS = 512
+
+
+def has_markdown_field(s: str) -> bool:
+    return '"markdown"' in s[:MARKDOWN_PROBE_CHARS]
+
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*([\s\S]+?)\s*```$", re.IGNORECASE)
 
 
 def clean_json_string(s: str) -> str:
@@ -13,15 +32,35 @@ def clean_json_string(s: str) -> str:
     """
     s = s.strip()
 
+    # Plain JSON (the usual case) never needs the regex
+    if not s.startswith("```"):
+        return s
+
     # Remove ```json fences
-    fence_pattern = r"^```(?:json)?\s*([\s\S]+?)\s*```$"
-    match = re.match(fence_pattern, s, flags=re.IGNORECASE)
+    match = _FENCE_RE.match(s)
     if match:
         return match.group(1).strip()
 
     return s
 
 
+_MARKDOWN_KEY_RE = re.compile(r'"markdown"\s*:\s*"')
+# What may legally follow the closing quote of the markdown value
+_STRING_END_RE = re.compile(r"\s*[,}]")
+_BARE_QUOTE_RE = re.compile(r'(?<!\\)"')
+
+
+def _decode_string_body(body: str) -> str:
+    """
+    Decode JSON escapes in a string body (no surrounding quotes),
+    tolerating stray unescaped quotes from the model.
+    """
+    try:
+        return scanstring(_BARE_QUOTE_RE.sub(r'\\"', body) + '"', 0, False)[0]
+    except ValueError:
+        return body
+
+
 def safe_extract_markdown(json_str: str):
     """
     Extracts {"markdown": "..."} even if JSON is malformed.
@@ -30,41 +69,59 @@ def safe_extract_markdown(json_str: str):
     # Try normal JSON parse
     try:
         return json.loads(json_str)
-    except:
+    except ValueError:
         pass
 
-    # Manual fallback: extract markdown field raw
-    md_match = re.search(r'"markdown"\s*:\s*"([\s\S]*)"', json_str)
+    # Manual fallback: decode the markdown string in place with the json
+    # module's own string scanner (handles every escape, no regex over the body)
+    md_match = _MARKDOWN_KEY_RE.search(json_str)
     if md_match:
-        raw_md = md_match.group(1)
+        start = md_match.end()
+        try:
+            value, end = scanstring(json_str, start, False)
+            if _STRING_END_RE.match(json_str, end):
+                return {"markdown": value}
+        except ValueError:
+            pass
+
+        # Unescaped quotes inside the value, or truncated output:
+        # take everything up to the last quote, as before
+        last = json_str.rfind('"')
+        body = json_str[start:last] if last >= start else json_str[start:]
+        return {"markdown": _decode_string_body(body)}
 
-        # Unescape sequences
-        raw_md = raw_md.replace('\\"', '"')
-        raw_md = raw_md.replace("\\'", "'")
-        raw_md = raw_md.replace("\\n", "\n")
+    raise ValueError("Unable to extract markdown from integration output.")
 
-        return {"markdown": raw_md}
 
-    raise ValueError("Unable to extract markdown from integration output.")
+# A compiled schema: returns the data when valid, raises JsonSchemaException otherwise
+SchemaValidator = Callable[[Any], Any]
+
+
+def compile_schema(schema: dict) -> SchemaValidator:
+    """
+    Compile a pre-parsed schema (see persona_router.load_schema_obj) into a
+    validator function. Compile once per schema and reuse it — fastjsonschema
+    generates Python code for the schema, so repeated checks skip the
+    interpretive tree walk jsonschema does on every call.
+    """
+    return fastjsonschema.compile(schema)
 
 
-def validate_json(output_str: str, schema_file: str):
+def validate_json(output_str: str, validator: SchemaValidator):
     """
     Validates JSON output from any persona.
     - Removes markdown code fences
     - Handles Integration markdown special-case
-    - Loads schema with UTF-8 (critical for Windows)
+    - Validates with a compiled schema (see compile_schema)
     - Returns (True, data) or (False, error_message)
     """
 
-    print("\n=== VALIDATING JSON ===")
-    print("Output str:", repr(output_str[:200]))
-    print("Using schema file:", schema_file)
+    logger.debug("Validating JSON: %r", output_str[:200])
 
     cleaned = clean_json_string(output_str.strip())
 
     # SPECIAL CASE: Integration Agent (contains "markdown":)
-    if cleaned.startswith("{") and '"markdown"' in cleaned:
+    if cleaned.startswith("{") and has_markdown_field(cleaned):
         try:
             data = safe_extract_markdown(cleaned)
             return True, data
@@ -77,20 +134,27 @@ def validate_json(output_str: str, schema_file: str):
         data = json.loads(cleaned)
 
     except Exception as e:
-        print("JSON PARSE FAILED:", e)
+        logger.debug("JSON parse failed: %s", e)
+        # Integration output with "markdown" further down (e.g. conflicts
+        # first) and raw newlines in it: the head probe above missed it
+        if cleaned.startswith("{") and '"markdown"' in cleaned:
+            try:
+                return True, safe_extract_markdown(cleaned)
+            except Exception:
+                pass
         return False, f"JSON parse error: {e}"
 
-    # Load schema with UTF-8 (fixes Windows charmap bug)
-    try:
-        with open(schema_file, "r", encoding="utf-8") as f:
-            schema = json.load(f)
-    except Exception as e:
-        return False, f"Schema load error: {e}"
+    return validate_data(data, validator)
 
-    # Validate
+
+def validate_data(data, validator: SchemaValidator):
+    """
+    Schema-check an already-parsed object (e.g. one slice of a combined
+    council response). Returns (True, data) or (False, error_message).
+    """
     try:
-        jsonschema.validate(data, schema)
+        validator(data)
         return True, data
-    except jsonschema.ValidationError as e:
-        print("SCHEMA VALIDATION FAILED:", e)
+    except fastjsonschema.JsonSchemaException as e:
+        logger.debug("Schema validation failed: %s", e)
         return False, f"Schema validation error: {e.message}"
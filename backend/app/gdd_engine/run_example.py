@@ -1,3 +1,5 @@
+import asyncio
+
 from orchestrator.orchestrator import GDDOrchestrator
 
 def main():
@@ -10,7 +12,7 @@ def main():
     engine = GDDOrchestrator(concept)
 
     try:
-        result = engine.run_pipeline()
+        result = asyncio.run(engine.run_pipeline())
     except Exception as e:
         print("\n❌ Pipeline Error:")
         print(e)
@@ -1,96 +1,247 @@
 # backend/app/gdd_engine/session_manager.py
 
-import uuid
-from typing import Dict, Any, List
+import os
+import secrets
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, List, Optional
+
+import orjson
+
 from .gdd_questions import QUESTIONS
 
-_GDD_SESSIONS: Dict[str, Dict[str, Any]] = {}
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import WatchError
+except ImportError:   # Redis is optional; sessions stay in-process without it
+    aioredis = None
+
+_N_QUESTIONS = len(QUESTIONS)
+
+
+def _new_legacy_session() -> Dict[str, Any]:
+    # answers[i] is the answer to QUESTIONS[i], or None while unanswered
+    return {"step": 0, "answers": [None] * _N_QUESTIONS, "completed": False}
+
+
+# "<n>. <question>\nAnswer: " for every question, built once for build_concept
+_Q_PREFIX = tuple(f"{i}. {q}\nAnswer: " for i, q in enumerate(QUESTIONS, start=1))
+_NO_ANSWER = "(No answer provided)"
+
+# In-process fallback is bounded: abandoned wizards can't grow RSS without limit
+MAX_SESSIONS = int(os.getenv("GDD_MAX_SESSIONS", "10000"))
+
+
+class _SessionLRU(OrderedDict):
+    """
+    Session dict that keeps at most MAX_SESSIONS entries. Reads and writes mark
+    a session as recently used; the least recently used one is evicted first,
+    after which its id simply 404s like an expired Redis session.
+    """
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > MAX_SESSIONS:
+            self.popitem(last=False)
+
+
+_GDD_SESSIONS: Dict[str, Dict[str, Any]] = _SessionLRU()
+
+# Set REDIS_URL to share wizard sessions across uvicorn workers / hosts
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL = int(os.getenv("GDD_SESSION_TTL", str(24 * 3600)))   # seconds
+SESSION_KEY = "gdd:sess:{}"
+
+# Striped per-session locks: updates to one session queue up locally instead
+# of all racing into WATCH and retrying, while different sessions (almost
+# always different stripes) proceed in parallel. Size must be a power of two.
+_LOCK_STRIPES = 64
+_LOCKS = [asyncio.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+def _lock_for(session_id: str) -> asyncio.Lock:
+    return _LOCKS[hash(session_id) & (_LOCK_STRIPES - 1)]
 
 
 class SessionManager:
-    def __init__(self):
+    def __init__(self, redis_url: Optional[str] = REDIS_URL):
         self._store = _GDD_SESSIONS
+        self._redis = None
+        if redis_url:
+            if aioredis is None:
+                raise RuntimeError("❌ REDIS_URL is set but the 'redis' package is not installed")
+            self._redis = aioredis.from_url(redis_url)
+
+    def _session(self, session_id: str) -> Dict[str, Any]:
+        """In-process session in one dict lookup; KeyError for unknown sessions."""
+        session = self._store.get(session_id)
+        if session is None:
+            raise KeyError(f"Session '{session_id}' not found.")
+        return session
+
+    # ---------------------------
+    # Async store API (used by gdd_api) — Redis hash or in-process dict
+    # ---------------------------
+    async def start_session(self, initial: Dict[str, Any]) -> str:
+        """Create a session holding `initial` and return its id."""
+        session_id = secrets.token_urlsafe(16)
+        if self._redis is None:
+            self._store[session_id] = initial
+        else:
+            await self.save(session_id, initial)
+        return session_id
+
+    async def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session data in a single lookup, or None if unknown / expired."""
+        if self._redis is None:
+            return self._store.get(session_id)
+
+        raw = await self._redis.hgetall(SESSION_KEY.format(session_id))
+        if not raw:
+            return None
+        return {field.decode(): orjson.loads(value) for field, value in raw.items()}
+
+    async def save(self, session_id: str, data: Dict[str, Any], fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Persist `data` (or only the named `fields` of it) and refresh the TTL.
+        In-process sessions are mutated in place, so this only matters for Redis.
+        """
+        names = list(fields) if fields is not None else list(data)
+
+        if self._redis is None:
+            session = self._store.get(session_id)
+            if session is None:
+                self._store[session_id] = data
+            elif session is not data:
+                session.update({name: data[name] for name in names})
+            return
+
+        key = SESSION_KEY.format(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={name: orjson.dumps(data[name]) for name in names})
+            pipe.expire(key, SESSION_TTL)
+            await pipe.execute()
+
+    async def update(self, session_id: str, mutate: Callable[[Dict[str, Any]], Any], fields: Iterable[str]) -> Any:
+        """
+        Atomic read-modify-write: apply `mutate` to the session and persist the
+        named `fields`, returning whatever `mutate` returns. On Redis the read
+        and write run under WATCH/MULTI/EXEC and are retried if another worker
+        touched the session in between, so concurrent /answer or /next calls
+        can't overwrite each other. Raises KeyError for unknown sessions.
+        """
+        if self._redis is None:
+            # No await between read and write — atomic on the event loop
+            return mutate(self._session(session_id))
+
+        names = list(fields)
+        key = SESSION_KEY.format(session_id)
+        async with _lock_for(session_id), self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.hgetall(key)
+                    if not raw:
+                        raise KeyError(f"Session '{session_id}' not found.")
+                    data = {field.decode(): orjson.loads(value) for field, value in raw.items()}
+                    result = mutate(data)
+
+                    pipe.multi()
+                    pipe.hset(key, mapping={name: orjson.dumps(data[name]) for name in names})
+                    pipe.expire(key, SESSION_TTL)
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    async def set_markdown(self, session_id: str, markdown: str) -> None:
+        """Store the generated GDD markdown — a single-field HSET, no read-modify-write."""
+        if self._redis is None:
+            self._session(session_id)["markdown"] = markdown
+            return
+        await self.save(session_id, {"markdown": markdown})
+
+    async def get_markdown(self, session_id: str) -> Optional[str]:
+        """
+        Generated markdown for a session (None until /finish has run).
+        Fetches just that field rather than the whole session.
+        Raises KeyError for unknown / expired sessions.
+        """
+        if self._redis is None:
+            return self._session(session_id).get("markdown")
+
+        raw = await self._redis.hget(SESSION_KEY.format(session_id), "markdown")
+        if raw is None:   # every live session has the field (null until /finish)
+            raise KeyError(f"Session '{session_id}' not found.")
+        return orjson.loads(raw)
+
+    # ---------------------------
+    # Legacy synchronous helpers (in-process store only)
+    # ---------------------------
 
     def create_session(self) -> str:
-        session_id = str(uuid.uuid4())
-        self._store[session_id] = {
-            "step": 0,
-            "answers": [],
-            "completed": False
-        }
+        session_id = secrets.token_urlsafe(16)
+        self._store[session_id] = _new_legacy_session()
         return session_id
 
     def session_exists(self, session_id: str) -> bool:
         return session_id in self._store
 
     def add_answer(self, session_id: str, answer: str) -> None:
-        if session_id not in self._store:
-            raise KeyError(f"Session '{session_id}' not found.")
-
-        session = self._store[session_id]
+        session = self._session(session_id)
         if session["completed"]:
             return
 
+        # One slot per question, allocated up front — a plain store, no append
         step = session["step"]
-        question = QUESTIONS[step] if step < len(QUESTIONS) else f"q_{step}"
+        session["answers"][step] = answer
 
-        session["answers"].append({
-            "question": question,
-            "answer": answer
-        })
-
-        session["step"] += 1
-        if session["step"] >= len(QUESTIONS):
+        session["step"] = step + 1
+        if step + 1 >= _N_QUESTIONS:
             session["completed"] = True
 
     def get_answers(self, session_id: str) -> List[Dict[str, str]]:
-        if session_id not in self._store:
-            raise KeyError(f"Session '{session_id}' not found.")
-        return self._store[session_id]["answers"]
+        session = self._session(session_id)
+        answers = session["answers"]
+        return [
+            {"question": QUESTIONS[i], "answer": answers[i]}
+            for i in range(session["step"])
+        ]
 
     def get_current_question(self, session_id: str):
-        if session_id not in self._store:
-            raise KeyError(f"Session '{session_id}' not found.")
-        step = self._store[session_id]["step"]
-        if step >= len(QUESTIONS):
+        step = self._session(session_id)["step"]
+        if step >= _N_QUESTIONS:
             return None
         return QUESTIONS[step]
 
     def is_completed(self, session_id: str) -> bool:
-        if session_id not in self._store:
-            raise KeyError(f"Session '{session_id}' not found.")
-        return self._store[session_id]["completed"]
+        return self._session(session_id)["completed"]
 
     def reset_session(self, session_id: str) -> None:
         if session_id in self._store:
-            self._store[session_id] = {
-                "step": 0,
-                "answers": [],
-                "completed": False
-            }
+            self._store[session_id] = _new_legacy_session()
 
     # ⭐⭐⭐ FIXED + AUTO-FILL VERSION ⭐⭐⭐
     def build_concept(self, session_id: str) -> str:
-        if session_id not in self._store:
-            raise KeyError(f"Session '{session_id}' not found.")
-
-        session = self._store[session_id]
-        answers = session["answers"]
-        total_questions = len(QUESTIONS)
-
-        # Auto-fill missing answers
-        if len(answers) < total_questions:
-            for i in range(len(answers), total_questions):
-                answers.append({
-                    "question": QUESTIONS[i],
-                    "answer": "(No answer provided)"
-                })
-
-        lines = ["Guided GDD inputs:"]
-        for idx, qa in enumerate(answers, start=1):
-            q = qa["question"]
-            a = qa["answer"]
-            lines.append(f"{idx}. {q}\nAnswer: {a}\n")
-
-        return "\n".join(lines)
-
+        answers = self._session(session_id)["answers"]
+
+        # Unanswered (None) slots are filled in here without touching the session
+        return "\n".join(
+            ["Guided GDD inputs:"]
+            + [
+                _Q_PREFIX[i] + (_NO_ANSWER if answers[i] is None else answers[i]) + "\n"
+                for i in range(_N_QUESTIONS)
+            ]
+        )
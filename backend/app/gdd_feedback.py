@@ -1,7 +1,7 @@
 from app.llm_orchestrator import stream_llm
 
-async def generate_designer_feedback(question: str, answer: str):
-    prompt = f"""
+# Static skeleton built once at import; only the two fields vary per call
+FEEDBACK_PROMPT = """
 You are a top 1% Lead Game Designer in the world,
 specialized in hybrid-casual free-to-play systems.
 
@@ -26,5 +26,9 @@ USER ANSWER:
 Now give short, sharp, high-value expert FEEDBACK:
 """
 
+
+async def generate_designer_feedback(question: str, answer: str):
+    prompt = FEEDBACK_PROMPT.format_map({"question": question, "answer": answer})
+
     async for token in stream_llm(prompt):
         yield token
@@ -1,98 +1,110 @@
 # llm_orchestrator.py
-import asyncio
-from openai import OpenAI
+import logging
+import httpx
+from openai import AsyncOpenAI
 from .config import CONFIG
 from app.routes.rag_routes import rag
 
+logger = logging.getLogger(__name__)
+
 API_KEY = CONFIG.get("AZURE_OPENAI_API_KEY")
 ENDPOINT = CONFIG.get("AZURE_OPENAI_ENDPOINT", "").rstrip("/")
 DEPLOYMENT = CONFIG.get("AZURE_OPENAI_DEPLOYMENT")
 API_VERSION = "2024-08-01-preview"
 
-client = OpenAI(
+# One pooled HTTP/2 transport for the process lifetime: concurrent WS sessions
+# multiplex streamed and one-shot completions over kept-alive connections
+# instead of paying a TCP + TLS handshake per call
+_http = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=httpx.Timeout(60.0, connect=5.0),
+)
+
+async_client = AsyncOpenAI(
     api_key=API_KEY,
     base_url=f"{ENDPOINT}/openai/deployments/{DEPLOYMENT}",
-    default_headers={"api-key": API_KEY}
+    default_headers={"api-key": API_KEY},
+    http_client=_http,
 )
 
-async def stream_llm(user_text: str):
+DESIGNER_PERSONA = "You are a top 1% hybrid-casual game designer."
+NO_RAG_CONTEXT = "No RAG context available for this question."
+# stream_llm reports a failure in-band as one token starting with this
+LLM_ERROR_PREFIX = "[LLM ERROR]"
+
+async def stream_llm(user_text: str, use_rag: bool = True):
     """
     Asynchronously stream LLM token deltas (yields strings).
-    Performs a RAG search first (best-effort).
+    Performs a RAG search first (best-effort) unless `use_rag` is False —
+    callers that already put retrieved context into `user_text` skip it.
     """
-    print("🔥 LLM CALL ->", user_text)
+    logger.debug("LLM call -> %s", user_text)
 
     # 1) RAG context (best-effort)
     context_text = ""
     try:
-        rag_results = rag.search(user_text, k=5)
+        rag_results = await rag.asearch(user_text, k=5) if use_rag else None
         if rag_results:
             context_text = "\n\n".join(
                 f"[Source: {r['meta'].get('file','unknown')}]\n{r['text']}"
                 for r in rag_results
             )
     except Exception as e:
-        print("RAG search error:", e)
+        logger.warning("RAG search error: %s", e)
         context_text = ""
 
+    # Static persona first, byte-identical on every call so the service can
+    # reuse its prompt cache for it; only the retrieval block varies
+    messages = [{"role": "system", "content": DESIGNER_PERSONA}]
     if context_text:
-        system_context = (
-            "You are a top 1% hybrid-casual game designer.\n"
-            "Use the following embedded knowledge to answer accurately.\n\n"
-            "=== START RAG CONTEXT ===\n"
-            f"{context_text}\n"
-            "=== END RAG CONTEXT ===\n"
-        )
-    else:
-        system_context = (
-            "You are a top 1% hybrid-casual game designer. "
-            "No RAG context available for this question."
-        )
+        messages.append({
+            "role": "system",
+            "content": (
+                "Use the following embedded knowledge to answer accurately.\n\n"
+                "=== START RAG CONTEXT ===\n"
+                f"{context_text}\n"
+                "=== END RAG CONTEXT ===\n"
+            ),
+        })
+    elif use_rag:
+        messages.append({"role": "system", "content": NO_RAG_CONTEXT})
+    messages.append({"role": "user", "content": user_text})
 
     try:
         # Use streaming completions from Azure OpenAI-compatible SDK
-        stream = client.chat.completions.create(
+        stream = await async_client.chat.completions.create(
             model=DEPLOYMENT,
-            messages=[
-                {"role": "system", "content": system_context},
-                {"role": "user", "content": user_text}
-            ],
+            messages=messages,
             stream=True,
             extra_query={"api-version": API_VERSION}
         )
 
-        for chunk in stream:
+        async for chunk in stream:
             # chunk may be an object with .choices, similar to openai streaming
             choices = getattr(chunk, "choices", None)
             if not choices:
-                await asyncio.sleep(0)
                 continue
 
             delta = choices[0].delta
             if delta and getattr(delta, "content", None):
                 yield delta.content
 
-            # tiny cooperative sleep so event loop can run
-            await asyncio.sleep(0)
-
     except Exception as e:
-        err = f"[LLM ERROR] {e}"
-        print("❌ LLM Streaming Error:", err)
+        err = f"{LLM_ERROR_PREFIX} {e}"
+        logger.error("LLM streaming error: %s", e)
         yield err
 
 async def run_completion(prompt: str, max_tokens: int = 150):
     """
     Simple one-shot non-streaming completion for internal system use.
     """
-    from openai import AsyncOpenAI
-
-    client = AsyncOpenAI()
-
-    resp = await client.chat.completions.create(
-        model="gpt-4o-mini",
+    resp = await async_client.chat.completions.create(
+        model=DEPLOYMENT,
         messages=[{"role": "user", "content": prompt}],
         max_tokens=max_tokens,
         temperature=0.4,
+        extra_query={"api-version": API_VERSION}
     )
 
-    return resp.choices[0].message["content"]
+    return resp.choices[0].message.content
@@ -3,29 +3,46 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import asyncio
+import logging
+
+# Logging is configured here, at the entrypoint — library modules only
+# create loggers. LOG_LEVEL=DEBUG brings back the LLM / validator traces.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
 from fastapi import FastAPI, WebSocket
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse
 
 # Keep router imports (they were in original main.py). These modules must exist.
 from .config import CONFIG
 from app.routes.rag_routes import router as rag_router
 from app.gdd_api import router as gdd_router
+from app.gdd_engine.orchestrator.llm_client import warmup as warm_llm_client
 
 # Import the stream handler (moved to stream_engine)
 from .stream_engine import azure_stream
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 static_path = os.path.join(os.path.dirname(__file__), "static")
 app.include_router(rag_router)
 app.mount("/static", StaticFiles(directory=static_path), name="static")
 app.include_router(gdd_router, prefix="/gdd", tags=["GDD"])
 
-# Print some basic config info (kept from original)
-AZURE_SPEECH_KEY = CONFIG["AZURE_SPEECH_KEY"]
-AZURE_SPEECH_REGION = CONFIG["AZURE_SPEECH_REGION"]
 
-print("🔐 Azure Speech Key Loaded:", AZURE_SPEECH_KEY[:5] + "****")
-print("🌍 Region:", AZURE_SPEECH_REGION)
+@app.on_event("startup")
+async def warm_connections():
+    # Each worker opens its Azure OpenAI connection before the first
+    # /api/orchestrate call instead of during it. Kept on app.state: the loop
+    # only holds a weak reference, so a bare task could be collected mid-flight.
+    app.state.warmup_task = asyncio.create_task(warm_llm_client())
+
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug(
+        "Azure Speech key loaded: %s, region: %s",
+        "yes" if CONFIG.get("AZURE_SPEECH_KEY") else "MISSING",
+        CONFIG.get("AZURE_SPEECH_REGION"),
+    )
 
 @app.websocket("/ws/stream")
 async def websocket_stream(ws: WebSocket):
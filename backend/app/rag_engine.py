@@ -8,12 +8,18 @@ RAG Engine (Azure OpenAI Embeddings + FAISS)
 - Store normalized vectors in FAISS
 - Map FAISS row index -> docstore (pickle)
 - Search using cosine similarity (IndexFlatIP)
+- Memoize search results (cleared whenever the index changes)
 """
 
 import os
 import re
 import time
 import pickle
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -32,6 +38,14 @@ except ImportError:
 from .config import CONFIG
 
 
+# Dedicated pool for blocking searches. A search is mostly waiting on the
+# Azure embeddings call (and embed_texts can sleep for minutes on a 429), so
+# the pool is sized for I/O, and kept apart from the default executor so a
+# rate-limited search can't starve TTS / file work running there.
+RAG_SEARCH_WORKERS = int(os.getenv("RAG_SEARCH_WORKERS", "16"))
+_RAG_POOL = ThreadPoolExecutor(max_workers=RAG_SEARCH_WORKERS, thread_name_prefix="rag-search")
+
+
 @dataclass
 class Chunk:
     id: str
@@ -50,6 +64,9 @@ class RAGEngine:
         batch_size: int = 64,
         api_version: str = "2024-08-01-preview",
         max_chunks_per_file: int = 300,   # split large files into parts of this many chunks
+        search_cache_size: int = 256,     # memoized (query, k) -> results entries
+        search_cache_ttl: float = 600.0,  # seconds a memoized result stays fresh
+        fp16_index: bool = True,          # store vectors as float16 (half the RAM / memory bandwidth)
     ):
         if faiss is None:
             raise RuntimeError("FAISS is not installed. Install faiss-cpu.")
@@ -60,6 +77,7 @@ class RAGEngine:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.embedding_dim = embedding_dim
+        self.fp16_index = fp16_index
 
         self.batch_size = batch_size
         self.api_version = api_version
@@ -85,6 +103,20 @@ class RAGEngine:
         # in-memory
         self.docstore: Dict[str, Any] = {}
         self.index = None
+        # FAISS indexes are not safe to search while add()/swap is underway:
+        # every read and mutation of index + docstore holds this lock.
+        # Embedding calls (the slow part) always run outside it.
+        self._index_lock = threading.Lock()
+
+        # search memo + in-flight dedupe for identical concurrent queries
+        self.search_cache_size = search_cache_size
+        self.search_cache_ttl = search_cache_ttl
+        self._search_cache: "OrderedDict[tuple, tuple]" = OrderedDict()   # key -> (expires_at, results)
+        self._search_cache_lock = threading.Lock()
+        self._search_inflight: Dict[tuple, asyncio.Future] = {}
+        # bumped whenever the memo is cleared, so a search that started
+        # against the old index can't write its stale result back
+        self._search_generation = 0
 
         # load existing index/docstore if present
         self._load_index()
@@ -97,6 +129,16 @@ class RAGEngine:
     # FAISS index helpers
     # ---------------------------
     def _create_faiss_index(self):
+        # Flat scan is bound by memory bandwidth; fp16 codes halve it with
+        # negligible recall loss on normalized embeddings. QT_fp16 needs no
+        # training, so add() works exactly as with IndexFlatIP. Indexes saved
+        # as float32 still load unchanged via read_index.
+        if self.fp16_index:
+            return faiss.IndexScalarQuantizer(
+                self.embedding_dim,
+                faiss.ScalarQuantizer.QT_fp16,
+                faiss.METRIC_INNER_PRODUCT,
+            )
         return faiss.IndexFlatIP(self.embedding_dim)
 
     def _load_index(self):
@@ -119,9 +161,47 @@ class RAGEngine:
             self.index = self._create_faiss_index()
 
     def _save_index(self):
+        # caller holds _index_lock
         faiss.write_index(self.index, str(self.index_path))
         with open(self.docstore_path, "wb") as f:
             pickle.dump(self.docstore, f)
+        # index contents changed -> memoized results are stale
+        self._clear_search_cache()
+
+    # ---------------------------
+    # Search memo helpers
+    # ---------------------------
+    @staticmethod
+    def _search_key(query: str, k: int) -> tuple:
+        # Case / whitespace variants of a spoken query share one entry
+        normalized = " ".join(query.lower().split())
+        return (hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest(), k)
+
+    def _search_cache_get(self, key: tuple):
+        with self._search_cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, results = entry
+            if expires_at <= time.monotonic():
+                del self._search_cache[key]
+                return None
+            self._search_cache.move_to_end(key)
+            return results
+
+    def _search_cache_put(self, key: tuple, results: list, generation: int):
+        with self._search_cache_lock:
+            if generation != self._search_generation:
+                return
+            self._search_cache[key] = (time.monotonic() + self.search_cache_ttl, results)
+            self._search_cache.move_to_end(key)
+            while len(self._search_cache) > self.search_cache_size:
+                self._search_cache.popitem(last=False)
+
+    def _clear_search_cache(self):
+        with self._search_cache_lock:
+            self._search_generation += 1
+            self._search_cache.clear()
 
     # ---------------------------
     # HTML extraction & cleaning
@@ -292,15 +372,16 @@ class RAGEngine:
         norms[norms == 0] = 1e-9
         vecs = vecs / norms
 
-        # Map FAISS row index -> docstore
-        base = self.index.ntotal
-        for i, c in enumerate(all_chunks):
-            key = str(base + i)
-            self.docstore[key] = {"text": c.text, "meta": c.meta}
+        with self._index_lock:
+            # Map FAISS row index -> docstore
+            base = self.index.ntotal
+            for i, c in enumerate(all_chunks):
+                key = str(base + i)
+                self.docstore[key] = {"text": c.text, "meta": c.meta}
 
-        # add to faiss
-        self.index.add(vecs)
-        self._save_index()
+            # add to faiss
+            self.index.add(vecs)
+            self._save_index()
 
         print(f"[RAG] Ingested {len(all_chunks)} chunks. Total chunks = {len(self.docstore)}")
 
@@ -308,26 +389,57 @@ class RAGEngine:
     # Search
     # ---------------------------
     def search(self, query: str, k: int = 5):
+        key = self._search_key(query, k)
+        cached = self._search_cache_get(key)
+        if cached is not None:
+            return list(cached)
+
+        generation = self._search_generation
+        results = self._search_uncached(query, k)
+        self._search_cache_put(key, results, generation)
+        return list(results)
+
+    async def asearch(self, query: str, k: int = 5):
+        """
+        Event-loop friendly search: runs the blocking embed + FAISS lookup
+        on the bounded RAG pool and lets identical concurrent queries share it.
+        """
+        key = self._search_key(query, k)
+        cached = self._search_cache_get(key)
+        if cached is not None:
+            return list(cached)
+
+        fut = self._search_inflight.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(_RAG_POOL, self.search, query, k)
+            self._search_inflight[key] = fut
+            fut.add_done_callback(lambda _f: self._search_inflight.pop(key, None))
+
+        return list(await asyncio.shield(fut))
+
+    def _search_uncached(self, query: str, k: int):
         q = self._clean(query)
         emb = self.embed_texts([q])[0]
         v = np.array(emb, dtype=np.float32)
         v = v / (np.linalg.norm(v) + 1e-9)
         v = v.reshape(1, -1)
 
-        if self.index.ntotal == 0:
-            return []
+        with self._index_lock:
+            if self.index.ntotal == 0:
+                return []
 
-        D, I = self.index.search(v, k)
-        results = []
-        for score, idx in zip(D[0], I[0]):
-            item = self.docstore.get(str(idx))
-            if not item:
-                continue
-            results.append({
-                "score": float(score),
-                "text": item["text"],
-                "meta": item["meta"],
-            })
+            D, I = self.index.search(v, k)
+            results = []
+            for score, idx in zip(D[0], I[0]):
+                item = self.docstore.get(str(idx))
+                if not item:
+                    continue
+                results.append({
+                    "score": float(score),
+                    "text": item["text"],
+                    "meta": item["meta"],
+                })
 
         return results
 
@@ -337,46 +449,42 @@ class RAGEngine:
     def remove_file(self, filename: str):
         filename = filename.strip().lower()
 
-        # Find all docstore keys belonging to this file
-        keys_to_delete = [
-            key for key, val in self.docstore.items()
-            if val.get("meta", {}).get("file", "").lower() == filename
-        ]
+        with self._index_lock:
+            # Chunks that survive the removal, in current row order
+            kept = [
+                val for val in self.docstore.values()
+                if val.get("meta", {}).get("file", "").lower() != filename
+            ]
+            removed = len(self.docstore) - len(kept)
 
-        if not keys_to_delete:
+        if not removed:
             print(f"[RAG] No chunks found for file: {filename}")
             return False
 
-        print(f"[RAG] Removing {len(keys_to_delete)} chunks for file: {filename}")
+        print(f"[RAG] Removing {removed} chunks for file: {filename}")
 
-        # Remove from docstore
-        for key in keys_to_delete:
-            del self.docstore[key]
-
-        # Rebuild FAISS
-        self._rebuild_faiss_index()
-        self._save_index()
+        # Rebuild FAISS (embeds outside the lock), then swap index + docstore together
+        new_index = self._rebuild_faiss_index(kept)
+        with self._index_lock:
+            self.index = new_index
+            self.docstore = {str(i): entry for i, entry in enumerate(kept)}
+            self._save_index()
 
         return True
 
     # -------------------------------------------
     # REBUILD FAISS INDEX FROM DOCSTORE
     # -------------------------------------------
-    def _rebuild_faiss_index(self):
+    def _rebuild_faiss_index(self, entries: List[Dict[str, Any]]):
+        """Build a fresh index over entries (row i = entries[i]); the caller swaps it in."""
         print("[RAG] Rebuilding FAISS index...")
 
         new_index = self._create_faiss_index()
-        texts = []
-        metas = []
-
-        for key, entry in self.docstore.items():
-            texts.append(entry["text"])
-            metas.append(entry["meta"])
+        texts = [entry["text"] for entry in entries]
 
         if not texts:
             print("[RAG] No chunks left. Fresh FAISS index created.")
-            self.index = new_index
-            return
+            return new_index
 
         embeddings = self.embed_texts(texts)
 
@@ -386,5 +494,5 @@ class RAGEngine:
         vecs = vecs / norms
 
         new_index.add(vecs)
-        self.index = new_index
         print("[RAG] Rebuild complete.")
+        return new_index
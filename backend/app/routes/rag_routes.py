@@ -1,6 +1,7 @@
 # app/routes/rag_routes.py
 
 import os
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from typing import List
 from pathlib import Path
@@ -9,12 +10,18 @@ from app.rag_engine import RAGEngine
 
 router = APIRouter()
 
-UPLOAD_DIR = Path("./data/uploads")
+# backend/data, resolved from this file so uploads and the index land in the
+# same place whatever directory the server is started from
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+UPLOAD_DIR = DATA_DIR / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # instantiate RAG engine (FAISS + Azure embeddings)
 # adjust embedding_dim if your embedding model differs
-rag = RAGEngine(index_dir="./data/faiss_index", embedding_dim=1536, batch_size=64, max_chunks_per_file=300)
+rag = RAGEngine(index_dir=str(DATA_DIR / "faiss_index"), embedding_dim=1536, batch_size=64, max_chunks_per_file=300)
+
+# Ingest / remove mutate the FAISS index + docstore; run them one at a time
+_index_write_lock = asyncio.Lock()
 
 @router.post("/rag/upload")
 async def upload_files(files: List[UploadFile] = File(...)):
@@ -24,8 +31,8 @@ async def upload_files(files: List[UploadFile] = File(...)):
         if ext not in [".html", ".htm", ".txt", ".md", ".docx", ".pdf"]:
             raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
         path = UPLOAD_DIR / f.filename
-        with open(path, "wb") as out:
-            out.write(await f.read())
+        data = await f.read()
+        await asyncio.to_thread(path.write_bytes, data)
         saved_files.append(str(path))
     return {"message": "Files uploaded", "files": saved_files}
 
@@ -36,7 +43,9 @@ async def ingest_uploaded_files():
         raise HTTPException(status_code=400, detail="No uploaded files.")
     paths = [str(p) for p in files]
     # Ingest (this may take a while depending on number of chunks and Azure quota)
-    rag.ingest_files(paths)
+    # — blocking embed + FAISS work runs off the event loop
+    async with _index_write_lock:
+        await asyncio.to_thread(rag.ingest_files, paths)
     # optional: remove uploaded files after ingestion
     for f in files:
         try:
@@ -49,7 +58,7 @@ async def ingest_uploaded_files():
 async def rag_search(query: str, k: int = 5):
     if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
-    results = rag.search(query, k)
+    results = await rag.asearch(query, k)
     return {"query": query, "results": results}
 
 @router.get("/rag/list")
@@ -61,7 +70,8 @@ async def list_uploaded_files():
 @router.delete("/rag/file/{filename}")
 async def delete_file(filename: str):
     filename = filename.strip()
-    success = rag.remove_file(filename)
+    async with _index_write_lock:
+        success = await asyncio.to_thread(rag.remove_file, filename)
 
     if not success:
         return {"message": f"No embeddings found for file {filename}"}
@@ -16,6 +16,7 @@ export let ws = null;
 export let wsReady = null;
 
 let ttsAudioContext = null;
+let ttsNextStart = 0;   // audio-clock time the next PCM chunk should start at
 let aiStreaming = false;
 let aiBubble = null;
 
@@ -27,10 +28,13 @@ export function stopAllPlayback() {
         if (ttsAudioContext) ttsAudioContext.close();
     } catch (e) { console.warn(e); }
     ttsAudioContext = null;
+    ttsNextStart = 0;
 }
 
 /* --------------------------------------------------
    PLAY PCM AUDIO
+   TTS arrives in several chunks per sentence; queue each one
+   right after the previous so they play back gapless.
 -------------------------------------------------- */
 export function playPcmChunk(buffer) {
     try {
@@ -47,7 +51,9 @@ export function playPcmChunk(buffer) {
         const src = ttsAudioContext.createBufferSource();
         src.buffer = audioBuffer;
         src.connect(ttsAudioContext.destination);
-        src.start();
+        const startAt = Math.max(ttsAudioContext.currentTime, ttsNextStart);
+        src.start(startAt);
+        ttsNextStart = startAt + audioBuffer.duration;
     } catch (err) {
         console.error("PCM error:", err);
     }
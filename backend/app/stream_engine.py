@@ -7,18 +7,27 @@ Unified, production-ready stream_engine.py
 - No duplicate LLM runs (llm_busy)
 """
 
-import uuid
-import json
+import secrets
+import orjson
+import logging
+import time
 import asyncio
 import re
-import traceback
+import hashlib
+import queue
+import threading
+from collections import OrderedDict
 import httpx
 import azure.cognitiveservices.speech as speechsdk
 
 from fastapi import WebSocket
 
 from .config import CONFIG
-from .llm_orchestrator import stream_llm
+from .llm_orchestrator import stream_llm, LLM_ERROR_PREFIX
+from .routes.rag_routes import rag
+from .gdd_engine.gdd_questions import QUESTIONS
+
+logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------
 # Configuration & constants
@@ -31,12 +40,48 @@ BYTES_PER_SAMPLE = 2
 MIN_PADDING = 0.02
 MAX_PADDING = 0.08
 
+# Pending STT events per connection (see azure_stream)
+STT_QUEUE_SIZE = 256
+# Minimum spacing between forwarded partial transcripts, in seconds
+STT_PARTIAL_INTERVAL = 0.05
+# Most mic frames (20 ms each) merged into a single push_stream.write
+STT_WRITE_MAX_FRAMES = 16
+
+# Background tasks (LLM streams, wizard calls) one session may have in flight
+MAX_SESSION_TASKS = 8
+
+# llm_stream coalescing (see stream_llm_to_client)
+LLM_STREAM_BATCH = 16       # tokens per frame
+LLM_STREAM_FLUSH = 0.025    # seconds
+
+# Idle SpeechSynthesizers kept warm for reuse (see azure_tts_generate_sync)
+TTS_POOL_SIZE = 4
+# Streamed TTS read size: 200 ms of 16 kHz 16-bit mono PCM per frame
+TTS_CHUNK_BYTES = 6400
+
+# Shared client for the wizard's calls into the local /gdd API —
+# one keep-alive pool instead of a new connection per request
+gdd_http = httpx.AsyncClient(base_url="http://localhost:8000", timeout=5.0)
+
+# QUESTIONS is an immutable tuple, so its length is fixed at import time
+_TOTAL_QUESTIONS = len(QUESTIONS)
+# Whole-utterance "next" commands (checked before the "go next" substring scan)
+_NEXT_KEYWORDS = frozenset({"next", "go next"})
+
+async def _send(ws: WebSocket, payload: dict) -> None:
+    """
+    ws.send_json with orjson encoding. Always a text frame — the client
+    treats every binary frame as PCM audio.
+    """
+    await ws.send_text(orjson.dumps(payload).decode())
+
+
 # ------------------------------------------------------------------
 # Per-session state (isolated inside this module)
 # ------------------------------------------------------------------
-llm_stop_flags = {}            # session -> bool (stop LLM)
+llm_stop_events = {}           # session -> asyncio.Event (stop LLM)
 tts_sentence_queue = {}        # session -> [sentence_text]
-tts_gen_tasks = {}             # session -> [asyncio.Task]
+tts_gen_tasks = {}             # session -> [(asyncio.Task, asyncio.Queue of PCM chunks)]
 tts_cancel_events = {}         # session -> asyncio.Event
 tts_playback_task = {}         # session -> asyncio.Task
 playback_ws_registry = {}      # session -> WebSocket
@@ -52,6 +97,17 @@ pending_user_text = {}      # session → last STT final text
 completion_timer = {}       # session → asyncio.Task
 pending_review_task = {}
 gdd_answer_buffer = {} 
+session_tasks = {}          # session -> set of in-flight background tasks
+
+# STT filler / noise that never counts as user input (compared lowercased)
+_NOISE_TOKENS = frozenset({"", ".", "uh", "um"})
+_NOISE_MAX_LEN = max(map(len, _NOISE_TOKENS))
+
+
+def is_noise(text: str) -> bool:
+    """Bounded-work noise check: only short strings are ever lowercased."""
+    text = text.strip()
+    return len(text) <= _NOISE_MAX_LEN and text.lower() in _NOISE_TOKENS
 # ------------------------------------------------------------------
 # Utilities
 # ------------------------------------------------------------------
@@ -59,11 +115,13 @@ def ensure_structs(session: str):
     """Ensure per-session data structures exist."""
     tts_sentence_queue.setdefault(session, [])
     tts_gen_tasks.setdefault(session, [])
-    tts_cancel_events.setdefault(session, asyncio.Event())
+    if session not in tts_cancel_events:
+        tts_cancel_events[session] = asyncio.Event()
     tts_playback_task.setdefault(session, None)
     playback_ws_registry.setdefault(session, None)
     assistant_is_speaking.setdefault(session, False)
-    llm_stop_flags.setdefault(session, False)
+    if session not in llm_stop_events:
+        llm_stop_events[session] = asyncio.Event()
     gdd_wizard_active.setdefault(session, False)
     gdd_wizard_stage.setdefault(session, 0)
     gdd_session_map.setdefault(session, None)
@@ -76,10 +134,48 @@ def ensure_structs(session: str):
     completion_timer.setdefault(session, None)
 
 
+def spawn_session_task(session: str, coro):
+    """
+    create_task for per-session background work, capped at MAX_SESSION_TASKS.
+    Returns the task, or None (coroutine discarded) when the session is full.
+    Tracked tasks are cancelled by cancel_session_tasks on disconnect.
+    """
+    tasks = session_tasks.setdefault(session, set())
+    if len(tasks) >= MAX_SESSION_TASKS:
+        coro.close()
+        logger.warning("[%s] %d tasks in flight -> rejecting new work", session, len(tasks))
+        return None
+    task = asyncio.create_task(coro)
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+    return task
+
+
+BUSY_NOTICE = "⏳ Still working on your earlier requests — please try again in a moment."
+
+
+async def notify_busy(ws: WebSocket, wizard: bool = False):
+    """Tell the client spawn_session_task turned its request away."""
+    try:
+        if wizard:
+            await _send(ws, {"type": "wizard_notice", "text": BUSY_NOTICE})
+        else:
+            # plain AI bubble — wizard_notice would switch the UI into wizard mode
+            await _send(ws, {"type": "llm_sentence", "sentence": BUSY_NOTICE})
+            await _send(ws, {"type": "llm_done"})
+    except Exception:
+        pass
+
+
+def cancel_session_tasks(session: str):
+    for task in session_tasks.pop(session, ()):
+        task.cancel()
+
+
 def cleanup_session(session: str):
     """Remove session data (best-effort)."""
     for d in [
-        llm_stop_flags, tts_sentence_queue, tts_gen_tasks, tts_cancel_events,
+        llm_stop_events, tts_sentence_queue, tts_gen_tasks, tts_cancel_events,
         tts_playback_task, playback_ws_registry, assistant_is_speaking,
         gdd_wizard_active, gdd_wizard_stage, gdd_session_map, llm_busy,
         pending_review_task, gdd_answer_buffer     # ← 🔥 ADD THESE TWO
@@ -90,15 +186,18 @@ def cleanup_session(session: str):
             pass
 
 
+_TTS_MARKUP_RE = re.compile(r"[*_`~]+")
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+
+
 def clean_sentence_for_tts(text: str) -> str:
     """Light cleaning to avoid TTS choking on markdown or weird characters."""
     if not text:
         return ""
     text = text.replace("#", " ")
-    text = re.sub(r"[*_`~]+", "", text)
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    text = _TTS_MARKUP_RE.sub("", text)
+    text = _MD_LINK_RE.sub(r"\1", text)
+    return " ".join(text.split())
 
 def adaptive_padding(sentence: str) -> float:
     if not sentence:
@@ -107,12 +206,26 @@ def adaptive_padding(sentence: str) -> float:
     pad = MIN_PADDING + (words / 50.0) * 0.02
     return max(MIN_PADDING, min(MAX_PADDING, pad))
 
+def drop_queued_tts(session: str, source: str):
+    """Cancel and unqueue not-yet-played sentences that came from `source`."""
+    queued = tts_sentence_queue.get(session) or []
+    gens = tts_gen_tasks.get(session) or []
+    keep_queued, keep_gens = [], []
+    for item, gen in zip(queued, gens):
+        if isinstance(item, tuple) and item[1] == source:
+            gen[0].cancel()
+        else:
+            keep_queued.append(item)
+            keep_gens.append(gen)
+    tts_sentence_queue[session] = keep_queued
+    tts_gen_tasks[session] = keep_gens
+
 def cancel_tts_generation(session: str):
     """Signal generator tasks to cancel and clear queues."""
     ev = tts_cancel_events.get(session)
     if ev:
         ev.set()
-    for t in list(tts_gen_tasks.get(session, []) or []):
+    for t, _ in list(tts_gen_tasks.get(session, []) or []):
         try:
             if t and not t.done():
                 t.cancel()
@@ -146,7 +259,7 @@ def extract_sentences(buffer: str):
     return sentences, remainder
 
 # ------------------------------------------------------------------
-# Azure TTS helpers (synchronous SDK call wrapped with to_thread)
+# Azure TTS helpers (synchronous SDK reads wrapped with to_thread)
 # ------------------------------------------------------------------
 speech_tts_config = speechsdk.SpeechConfig(
     subscription=AZURE_SPEECH_KEY,
@@ -157,35 +270,83 @@ speech_tts_config.set_speech_synthesis_output_format(
     speechsdk.SpeechSynthesisOutputFormat.Raw16Khz16BitMonoPcm
 )
 
-def azure_tts_generate_sync(text: str) -> bytes:
-    """Blocking call to Azure TTS SDK - returns raw PCM bytes (16kHz 16-bit mono)."""
-    synthesizer = speechsdk.SpeechSynthesizer(
-        speech_config=speech_tts_config, audio_config=None
-    )
-    result = synthesizer.speak_text_async(text).get()
-    if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-        return result.audio_data
-    print("❌ Azure TTS error:", result.reason)
-    return b""
+# Synthesizers hold an open connection to the TTS endpoint, so reusing them
+# skips the TLS/websocket handshake on every sentence. Calls run on worker
+# threads (async_tts), hence a thread-safe queue rather than an asyncio one;
+# each synthesizer is checked out by one call at a time.
+_tts_pool: "queue.SimpleQueue[speechsdk.SpeechSynthesizer]" = queue.SimpleQueue()
+
+def _checkout_synthesizer() -> speechsdk.SpeechSynthesizer:
+    try:
+        return _tts_pool.get_nowait()
+    except queue.Empty:
+        return speechsdk.SpeechSynthesizer(
+            speech_config=speech_tts_config, audio_config=None
+        )
+
+def azure_tts_stream_sync(text: str, emit, stop: threading.Event) -> None:
+    """
+    Blocking call to Azure TTS SDK. Calls emit(pcm_bytes) for each chunk
+    (16kHz 16-bit mono) as soon as Azure produces it, until done or stop is set.
+    """
+    synthesizer = _checkout_synthesizer()
+    result = synthesizer.start_speaking_text_async(text).get()
+    stream = speechsdk.AudioDataStream(result)
+    buf = bytes(TTS_CHUNK_BYTES)
+    while not stop.is_set():
+        filled = stream.read_data(buf)
+        if not filled:
+            break
+        emit(buf[:filled])
+    if stop.is_set():
+        # Barge-in: stop the service-side synthesis too, otherwise it keeps
+        # running (and billing) for audio nobody will hear
+        try:
+            synthesizer.stop_speaking_async().get()
+        except Exception as e:
+            logger.warning("Azure TTS stop failed: %s", e)
+            return   # state unknown; don't hand it to the next caller
+        if _tts_pool.qsize() < TTS_POOL_SIZE:
+            _tts_pool.put(synthesizer)
+        return
+    if stream.status == speechsdk.StreamStatus.AllData:
+        if _tts_pool.qsize() < TTS_POOL_SIZE:
+            _tts_pool.put(synthesizer)
+        return
+    # Canceled (auth expiry, dropped connection, ...): discard the synthesizer
+    # so the next call builds a fresh one.
+    logger.error("Azure TTS error: %s", stream.status)
+
+async def async_tts_stream(text: str, chunks: asyncio.Queue) -> None:
+    """Feed PCM chunks for text into chunks, followed by a None end marker."""
+    loop = asyncio.get_running_loop()
+    stop = threading.Event()
+
+    def emit(chunk: bytes):
+        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
 
-async def async_tts(text: str) -> bytes:
-    return await asyncio.to_thread(azure_tts_generate_sync, text)
+    try:
+        await asyncio.to_thread(azure_tts_stream_sync, text, emit, stop)
+    except Exception as e:
+        logger.error("Azure TTS error: %s", e)
+    finally:
+        stop.set()
+        chunks.put_nowait(None)
 
 # ------------------------------------------------------------------
 # Playback worker — dequeues TTS tasks, streams PCM to websocket
 # ------------------------------------------------------------------
 async def tts_playback_worker(session: str):
-    """Worker that takes pre-generated TTS tasks and streams PCM to client websocket.
+    """Worker that takes in-flight TTS tasks and streams PCM to client websocket.
     Each sentence enqueued results in:
-      - ws.json({"type":"sentence_start","text": sentence_text})
-      - ws.send_bytes(pcm_bytes)
-      - sleep(duration + padding)
+      - ws.send_bytes(pcm_chunk) for every chunk, as soon as it is synthesized
+      - sleep until the sentence has played out, plus padding
     """
     ws = playback_ws_registry.get(session)
     if not ws:
         return
 
-    print(f"▶ Playback worker started for {session}")
+    logger.debug("Playback worker started for %s", session)
     ensure_structs(session)
 
     try:
@@ -201,7 +362,7 @@ async def tts_playback_worker(session: str):
                 await asyncio.sleep(0.01)
                 continue
 
-            gen_task = tts_gen_tasks[session].pop(0)
+            gen_task, chunks = tts_gen_tasks[session].pop(0)
             item = tts_sentence_queue[session].pop(0)
             if isinstance(item, tuple):
                 sentence_text, source = item
@@ -221,34 +382,45 @@ async def tts_playback_worker(session: str):
             # Only UI-sync wizard questions; LLM sentences already shown
 
 
-            # await audio generation result
+            # forward chunks as they are synthesized
+            sent = 0
+            started = 0.0
+            ws_closed = False
             try:
-                audio_bytes = await gen_task
-            except asyncio.CancelledError:
-                audio_bytes = b""
-            except Exception:
-                audio_bytes = b""
-
-            if not audio_bytes:
-                continue
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is None or tts_cancel_events[session].is_set():
+                        break
+                    if not sent:
+                        assistant_is_speaking[session] = True
+                        started = time.monotonic()
+                    try:
+                        await ws.send_bytes(chunk)
+                    except Exception:
+                        ws_closed = True
+                        break
+                    sent += len(chunk)
+            finally:
+                # This sentence is no longer in tts_gen_tasks, so cancel_tts_generation
+                # can't reach it: stop its synthesis here (no-op once it finished)
+                gen_task.cancel()
 
-            # stream bytes
-            assistant_is_speaking[session] = True
-            try:
-                await ws.send_bytes(audio_bytes)
-            except Exception:
+            if ws_closed or tts_cancel_events[session].is_set():
                 assistant_is_speaking[session] = False
                 break
+            if not sent:
+                continue
 
-            # sleep for duration + adaptive padding
-            duration = len(audio_bytes) / (SAMPLE_RATE * BYTES_PER_SAMPLE)
-            await asyncio.sleep(duration + adaptive_padding(sentence_text))
+            # sleep until playback ends + adaptive padding
+            duration = sent / (SAMPLE_RATE * BYTES_PER_SAMPLE)
+            remaining = started + duration - time.monotonic()
+            await asyncio.sleep(max(remaining, 0.0) + adaptive_padding(sentence_text))
 
             assistant_is_speaking[session] = False
 
         # finished: signal voice_done
         try:
-            await ws.send_json({"type": "voice_done"})
+            await _send(ws, {"type": "voice_done"})
         except Exception:
             pass
 
@@ -258,7 +430,7 @@ async def tts_playback_worker(session: str):
         tts_gen_tasks[session] = []
         tts_cancel_events[session] = asyncio.Event()
         assistant_is_speaking[session] = False
-        print(f"⏹ Playback finished for {session}")
+        logger.debug("Playback finished for %s", session)
 
 # ------------------------------------------------------------------
 # Enqueue TTS generation for a sentence (non-blocking)
@@ -271,8 +443,9 @@ def enqueue_sentence_for_tts(session: str, sentence: str, source="llm"):
     # mark each queued item with its source
     tts_sentence_queue[session].append((sentence, source))
 
-    task = asyncio.create_task(async_tts(sentence))
-    tts_gen_tasks[session].append(task)
+    chunks = asyncio.Queue()
+    task = asyncio.create_task(async_tts_stream(sentence, chunks))
+    tts_gen_tasks[session].append((task, chunks))
 
     # ensure playback worker running
     if not tts_playback_task.get(session) or tts_playback_task[session].done():
@@ -281,27 +454,43 @@ def enqueue_sentence_for_tts(session: str, sentence: str, source="llm"):
 # ------------------------------------------------------------------
 # LLM -> sentences streaming helper
 # ------------------------------------------------------------------
-async def stream_llm_to_client(ws: WebSocket, session: str, user_text: str):
+async def stream_llm_to_client(ws: WebSocket, session: str, user_text: str, use_rag: bool = True):
     """
-    Stream tokens from stream_llm(user_text), extract sentence-level pieces,
+    Stream tokens from stream_llm(user_text, use_rag), extract sentence-level pieces,
     send `llm_sentence` events and enqueue corresponding TTS generation.
     Sends `llm_stream` token events too (UI may ignore tokens).
     """
     ensure_structs(session)
-    llm_stop_flags[session] = False
+    stop_event = llm_stop_events[session]
+    stop_event.clear()
     token_buffer = ""
+    # llm_stream tokens go out in small batches — one frame per
+    # LLM_STREAM_BATCH tokens or LLM_STREAM_FLUSH seconds, not one per token
+    pending_tokens = []
+    last_flush = time.monotonic()
+
+    async def flush_tokens():
+        nonlocal last_flush
+        last_flush = time.monotonic()
+        if not pending_tokens:
+            return
+        chunk = "".join(pending_tokens)
+        pending_tokens.clear()
+        try:
+            await _send(ws, {"type": "llm_stream", "token": chunk})
+        except Exception:
+            pass
 
     try:
-        async for token in stream_llm(user_text):
-            if llm_stop_flags.get(session):
-                print(f"[{session}] LLM stop flag set -> breaking stream")
+        async for token in stream_llm(user_text, use_rag=use_rag):
+            if stop_event.is_set():
+                logger.debug("[%s] LLM stop event set -> breaking stream", session)
                 break
 
-            # forward token (UI-level may ignore)
-            try:
-                await ws.send_json({"type": "llm_stream", "token": token})
-            except Exception:
-                pass
+            # forward tokens (UI-level may ignore)
+            pending_tokens.append(token)
+            if len(pending_tokens) >= LLM_STREAM_BATCH or time.monotonic() - last_flush >= LLM_STREAM_FLUSH:
+                await flush_tokens()
 
             token_buffer += token
             sentences, token_buffer = extract_sentences(token_buffer)
@@ -309,37 +498,39 @@ async def stream_llm_to_client(ws: WebSocket, session: str, user_text: str):
             for s in sentences:
                 # publish sentence event to UI
                 try:
-                    await ws.send_json({"type": "llm_sentence", "sentence": s})
+                    await _send(ws, {"type": "llm_sentence", "sentence": s})
                 except Exception:
                     pass
                 # enqueue TTS generation (cleaned)
                 enqueue_sentence_for_tts(session, clean_sentence_for_tts(s))
 
     except Exception as e:
-        print("stream_llm_to_client error:", e)
-        traceback.print_exc()
+        logger.exception("stream_llm_to_client error: %s", e)
+        await flush_tokens()
         try:
-            await ws.send_json({"type": "llm_stream", "token": f"[ERR] {e}"})
+            await _send(ws, {"type": "llm_stream", "token": f"[ERR] {e}"})
         except Exception:
             pass
 
     finally:
         # ALWAYS unlock LLM no matter what happened
         llm_busy[session] = False
-        print(f"[{session}] LLM unlocked (finally block)")   
+        logger.debug("[%s] LLM unlocked (finally block)", session)
     
 
     # leftover
+    if not stop_event.is_set():
+        await flush_tokens()
     if token_buffer.strip():
         rem = token_buffer.strip()
         try:
-            await ws.send_json({"type": "llm_sentence", "sentence": rem})
+            await _send(ws, {"type": "llm_sentence", "sentence": rem})
         except Exception:
             pass
         enqueue_sentence_for_tts(session, clean_sentence_for_tts(rem))
 
     try:
-        await ws.send_json({"type": "llm_done"})
+        await _send(ws, {"type": "llm_done"})
     except Exception:
         pass
 
@@ -348,10 +539,12 @@ async def stream_llm_to_client(ws: WebSocket, session: str, user_text: str):
 # --------------------------------------------------------------------
 # ONE-SHOT LLM REVIEW FUNCTION (Azure Realtime, same as stream_llm)
 # --------------------------------------------------------------------
-async def run_llm_short_review(prompt: str) -> str:
+async def run_llm_short_review(prompt: str, on_sentence=None) -> str:
     """
     Runs a short Azure review using the SAME Realtime pipeline
     used by stream_llm().
+    If `on_sentence` is given it is awaited with each complete sentence
+    as soon as it streams in (e.g. to start TTS before the review ends).
     """
     system = (
         "You are a collaborative, visionary game director helping a designer shape ideas.\n"
@@ -366,13 +559,54 @@ async def run_llm_short_review(prompt: str) -> str:
 
 
     full_prompt = f"{system}\n\nUser Answer:\n{prompt}\n\nYour response:"
-    full_text = ""
+    parts = []   # joined once at the end instead of re-copying per token
+    pending = ""
 
     async for token in stream_llm(full_prompt):
+        if token.startswith(LLM_ERROR_PREFIX):
+            # not a review — fail so the caller neither shows nor caches it
+            raise RuntimeError(token)
         if token:
-            full_text += token
+            parts.append(token)
+            if on_sentence:
+                pending += token
+                sentences, pending = extract_sentences(pending)
+                for sentence in sentences:
+                    await on_sentence(sentence)
+
+    if on_sentence and pending.strip():
+        await on_sentence(pending.strip())
 
-    return full_text.strip()
+    return "".join(parts).strip()
+
+# ------------------------------------------------------------------
+# Wizard review cache — (question, sha256(answer)) -> review text
+# Re-submitting an identical answer doesn't pay for another LLM review.
+# ------------------------------------------------------------------
+REVIEW_CACHE_SIZE = 256
+_review_cache = OrderedDict()
+
+
+def _review_cache_key(question: str, answer: str):
+    return (question, hashlib.sha256(answer.encode("utf-8")).hexdigest())
+
+
+def get_cached_review(question: str, answer: str):
+    key = _review_cache_key(question, answer)
+    review = _review_cache.get(key)
+    if review is not None:
+        _review_cache.move_to_end(key)
+    return review
+
+
+def store_cached_review(question: str, answer: str, review: str):
+    if not review or review.startswith(LLM_ERROR_PREFIX):
+        return
+    key = _review_cache_key(question, answer)
+    _review_cache[key] = review
+    _review_cache.move_to_end(key)
+    while len(_review_cache) > REVIEW_CACHE_SIZE:
+        _review_cache.popitem(last=False)
 
 # ------------------------------------------------------------------
 # SMART COMPLETION 2.0 — Incomplete Answer Detection + Nudges
@@ -391,6 +625,9 @@ NUDGES = [
     "If that’s your full answer, I can respond — just let me know.",
 ]
 
+_TRAILING_CONTINUATION_RE = re.compile(r"(and|but|which|so|because|like|kinda|sort of)\s*$")
+
+
 def is_incomplete_answer(text: str) -> bool:
     text = text.strip().lower()
 
@@ -411,7 +648,7 @@ def is_incomplete_answer(text: str) -> bool:
         return True
 
     # Ends with conjunction/comma = user is continuing
-    if re.search(r"(and|but|which|so|because|like|kinda|sort of)[\s]*$", text):
+    if _TRAILING_CONTINUATION_RE.search(text):
         return True
 
     # Short but *complete* answers (3–6 words) should be accepted
@@ -427,6 +664,93 @@ def pick_nudge() -> str:
     return random.choice(NUDGES)
 
 
+# ------------------------------------------------------------------
+# Review prompt skeletons — built once, filled with format_map per call
+# ------------------------------------------------------------------
+WIZARD_REVIEW_PROMPT = (
+    "Question:\n{question}\n\n"
+    "User Answer:\n{answer}\n\n"
+    "Offer 2–4 inspiring, collaborative suggestions that expand the idea. "
+    "Avoid criticism. Build on the user’s creative direction."
+)
+
+ANSWER_REVIEW_PROMPT = """
+You are a senior game designer reviewing ONE answer to a GDD question.
+Stay strictly inside THIS question's context.
+
+QUESTION:
+{question}
+
+ANSWER:
+{answer}
+
+Provide a short, concise 2–3 sentence suggestion.
+Do NOT ask new questions.
+Do NOT change topic.
+Only critique or refine the answer itself.
+"""
+
+
+# ------------------------------------------------------------------
+# Cheap pre-review — canned replies that make the LLM critique unnecessary
+# ------------------------------------------------------------------
+REQUEST_KEYWORDS = ("suggest", "suggestion", "ideas", "sensations", "expand", "help", "inspire")
+
+# "No", "nothing else", "not sure yet"... — nothing for the LLM to build on
+# The whole answer must be the decline: "No ads at all" or "Pass and play"
+# are real answers and go on to the review.
+_DECLINE_RE = re.compile(
+    r"(?:no|nope|none|nothing|n/?a|skip|pass|not sure|no idea|i don'?t know|i'?m not sure)[.!]?"
+)
+DECLINE_ACK = "No problem — we can come back to this later. Say Go Next when you're ready."
+
+
+def cheap_review(question_text: str, answer: str) -> str | None:
+    """
+    Heuristic first pass over a wizard answer.
+    Returns a canned reply when the answer doesn't warrant an LLM critique,
+    or None to fall through to the full review.
+    """
+    lowered = answer.strip().lower()
+    words = lowered.split()
+
+    # 1) Declined / non-answer → acknowledge and move on
+    if _DECLINE_RE.fullmatch(lowered):
+        return DECLINE_ACK
+
+    # 2) Incomplete → nudge only
+    if is_incomplete_answer(answer):
+        return pick_nudge()
+
+    # 3) Short but complete → elaboration (explicit requests are exempt)
+    if (
+        3 <= len(words) <= 6
+        and lowered.endswith((".", "!", "?"))
+        and not any(k in lowered for k in REQUEST_KEYWORDS)
+    ):
+        if "rts" in question_text.lower():
+            return "Would you like to expand on what makes your RTS idea unique?"
+        return "Would you like to expand on that thought?"
+
+    return None
+
+
+# ------------------------------------------------------------------
+# Wizard intent phrases — compiled once, matched in a single pass
+# ------------------------------------------------------------------
+ACTIVATION_PHRASES = (
+    "activate gdd wizard", "activate gd wizard", "activate the gdd wizard",
+    "start gdd wizard", "start the gdd wizard", "open gdd wizard",
+    "launch gdd wizard", "activate wizard", "start wizard"
+)
+EXPORT_PHRASES = ("export gdd", "export the gdd", "download gdd", "export document")
+FINISH_PHRASES = ("finish gdd", "generate gdd", "complete gdd")
+
+_ACTIVATION_RE = re.compile("|".join(map(re.escape, ACTIVATION_PHRASES)))
+_EXPORT_RE = re.compile("|".join(map(re.escape, EXPORT_PHRASES)))
+_FINISH_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, FINISH_PHRASES)) + r")\b")
+
+
 # ------------------------------------------------------------------
 # Unified GDD Wizard handler (single code path for text & voice)
 # Returns True if wizard handled the message (no LLM call should follow)
@@ -440,21 +764,16 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
 
     lower = (raw_text or "").lower().strip()
     normalized = lower.replace(".", "").replace("?", "").replace("!", "")
-    normalized = re.sub(r"\s+", " ", normalized).strip()
+    normalized = " ".join(normalized.split())
     normalized = normalized.replace("g d d", "gdd").replace("g d", "gd")
 
-    # activation phrases
-    activation_phrases = [
-        "activate gdd wizard", "activate gd wizard", "activate the gdd wizard",
-        "start gdd wizard", "start the gdd wizard", "open gdd wizard",
-        "launch gdd wizard", "activate wizard", "start wizard"
-    ]
-
     # -------- ACTIVATE ----------
-    if any(p in normalized for p in activation_phrases):
+    if _ACTIVATION_RE.search(normalized):
 
         # INTERRUPT ANY ACTIVE LLM/TTS
-        llm_stop_flags[session] = True
+        stop = llm_stop_events.get(session)
+        if stop:
+            stop.set()
 
         ev = tts_cancel_events.get(session)
         if ev:
@@ -471,21 +790,13 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
         assistant_is_speaking[session] = False
 
         try:
-            await ws.send_json({"type": "stop_all"})
+            await _send(ws, {"type": "stop_all"})
         except:
             pass
 
         tts_cancel_events[session] = asyncio.Event()
         assistant_is_speaking[session] = False
 
-        try:
-            from app.gdd_engine.gdd_questions import QUESTIONS
-        except Exception:
-            try:
-                from gdd_engine.gdd_questions import QUESTIONS
-            except Exception:
-                QUESTIONS = []
-
         gdd_wizard_active[session] = True
         gdd_wizard_stage[session] = 0
         gdd_answer_buffer[session] = []  # 
@@ -498,43 +809,45 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
 
         async def _start():
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    res = await client.post("http://localhost:8000/gdd/start")
+                res = await gdd_http.post("/gdd/start", timeout=5.0)
 
                 if res.status_code == 200:
                     j = res.json()
                     gdd_session_map[session] = j.get("session_id", "")
                     try:
-                        await ws.send_json({"type": "gdd_session_id", "session_id": gdd_session_map[session]})
+                        await _send(ws, {"type": "gdd_session_id", "session_id": gdd_session_map[session]})
                     except:
                         pass
                 else:
-                    print("⚠ /gdd/start failed:", res.status_code)
+                    logger.warning("/gdd/start failed: %s", res.status_code)
 
             except Exception as e:
-                print("❌ Exception calling /gdd/start:", e)
+                logger.error("Exception calling /gdd/start: %s", e)
 
-        asyncio.create_task(_start())
+        if not spawn_session_task(session, _start()):
+            gdd_wizard_active[session] = False
+            await notify_busy(ws, wizard=True)
+            return True
 
         try:
-            await ws.send_json({"type": "final", "text": raw_text})
+            await _send(ws, {"type": "final", "text": raw_text})
         except:
             pass
 
         try:
-            await ws.send_json({
+            await _send(ws, {
                 "type": "wizard_notice",
                 "text": "🎮 **GDD Wizard Activated!** Say *Go Next* anytime.",
                 "wizard_active": True
             })
 
             if QUESTIONS:
-                await ws.send_json({"type": "llm_done"})
-                await ws.send_json({
+                await _send(ws, {"type": "llm_done"})
+                await _send(ws, {
                     "type": "wizard_question",
                     "text": QUESTIONS[0],
                     "index": 0,
-                    "total": len(QUESTIONS),
+                    "total": _TOTAL_QUESTIONS,
                     "voice": QUESTIONS[0]
                 })
 
@@ -549,21 +862,13 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
 
     # -------- GO NEXT ----------
     # -------- GO NEXT ----------
-    if gdd_wizard_active.get(session, False) and ("go next" in normalized or normalized == "next"):
-
-        try:
-            from app.gdd_engine.gdd_questions import QUESTIONS
-        except:
-            try:
-                from gdd_engine.gdd_questions import QUESTIONS
-            except:
-                QUESTIONS = []
+    if gdd_wizard_active.get(session, False) and (normalized in _NEXT_KEYWORDS or "go next" in normalized):
 
         stage = gdd_wizard_stage.get(session, 0) + 1
 
-        if stage >= len(QUESTIONS):
+        if stage >= _TOTAL_QUESTIONS:
             try:
-                await ws.send_json({"type": "wizard_notice", "text": "🎉 All questions answered! Say **Finish GDD**."})
+                await _send(ws, {"type": "wizard_notice", "text": "🎉 All questions answered! Say **Finish GDD**."})
             except:
                 pass
             return True
@@ -573,7 +878,7 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
         if task and not task.done():
             try:
                 task.cancel()
-                print(f"[{session}] GO NEXT -> cancelled pending review task")
+                logger.debug("[%s] GO NEXT -> cancelled pending review task", session)
             except:
                 pass
         pending_review_task[session] = None
@@ -582,12 +887,12 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
 
 
         try:
-            await ws.send_json({"type": "llm_done"})
-            await ws.send_json({
+            await _send(ws, {"type": "llm_done"})
+            await _send(ws, {
                 "type": "wizard_question",
                 "text": QUESTIONS[stage],
                 "index": stage,
-                "total": len(QUESTIONS),
+                "total": _TOTAL_QUESTIONS,
                 "voice": QUESTIONS[stage]
             })
         except:
@@ -600,60 +905,60 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
         return True
 
     # -------- FINISH GDD ----------
-    if gdd_wizard_active.get(session, False) and re.search(r"\b(finish gdd|generate gdd|complete gdd)\b", normalized):
+    if gdd_wizard_active.get(session, False) and _FINISH_RE.search(normalized):
 
         async def _finish():
             try:
                 gdd_sid = gdd_session_map.get(session)
                 if not gdd_sid:
-                    await ws.send_json({"type": "wizard_notice", "text": "❌ No GDD session found — nothing to finish."})
+                    await _send(ws, {"type": "wizard_notice", "text": "❌ No GDD session found — nothing to finish."})
                     gdd_wizard_active[session] = False
                     gdd_wizard_stage[session] = 0
                     return
 
-                async with httpx.AsyncClient(timeout=20.0) as client:
-                    res = await client.post("http://localhost:8000/gdd/finish", json={"session_id": gdd_sid})
+                res = await gdd_http.post("/gdd/finish", json={"session_id": gdd_sid}, timeout=20.0)
 
                 if res.status_code == 200:
                     data = res.json()
-                    await ws.send_json({"type": "wizard_notice", "text": "📘 **Your GDD is ready! Say Download GDD to Download it**"})
-                    await ws.send_json({"type": "final", "text": data.get("markdown", "")})
+                    await _send(ws, {"type": "wizard_notice", "text": "📘 **Your GDD is ready! Say Download GDD to Download it**"})
+                    await _send(ws, {"type": "final", "text": data.get("markdown", "")})
                 else:
-                    await ws.send_json({"type": "wizard_notice", "text": f"❌ Error generating GDD ({res.status_code})."})
+                    await _send(ws, {"type": "wizard_notice", "text": f"❌ Error generating GDD ({res.status_code})."})
 
             except Exception as e:
-                print("❌ ERROR inside _finish():", e)
-                await ws.send_json({"type": "wizard_notice", "text": "❌ Exception generating GDD."})
+                logger.error("Error inside _finish(): %s", e)
+                await _send(ws, {"type": "wizard_notice", "text": "❌ Exception generating GDD."})
 
             finally:
                 gdd_wizard_active[session] = False
 
-        asyncio.create_task(_finish())
+        if not spawn_session_task(session, _finish()):
+            await notify_busy(ws, wizard=True)
         return True
 
     # -------- EXPORT ----------
-    if any(p in normalized for p in ("export gdd", "export the gdd", "download gdd", "export document")):
+    if _EXPORT_RE.search(normalized):
 
         gdd_sid = gdd_session_map.get(session)
         if not gdd_sid:
-            await ws.send_json({"type": "wizard_notice", "text": "❌ No GDD available to export. Finish GDD first."})
+            await _send(ws, {"type": "wizard_notice", "text": "❌ No GDD available to export. Finish GDD first."})
             return True
 
         async def _export():
             try:
-                async with httpx.AsyncClient() as client:
-                    res = await client.post("http://localhost:8000/gdd/export", json={"session_id": gdd_sid})
+                res = await gdd_http.post("/gdd/export", json={"session_id": gdd_sid})
 
                 if res.status_code != 200:
-                    await ws.send_json({"type": "wizard_notice", "text": f"❌ Export failed ({res.status_code})."})
+                    await _send(ws, {"type": "wizard_notice", "text": f"❌ Export failed ({res.status_code})."})
                     return
 
-                await ws.send_json({"type": "gdd_export_ready", "filename": f"GDD_{gdd_sid}.docx"})
+                await _send(ws, {"type": "gdd_export_ready", "filename": f"GDD_{gdd_sid}.docx"})
 
             except Exception:
-                await ws.send_json({"type": "wizard_notice", "text": "❌ Export failed."})
+                await _send(ws, {"type": "wizard_notice", "text": "❌ Export failed."})
 
-        asyncio.create_task(_export())
+        if not spawn_session_task(session, _export()):
+            await notify_busy(ws, wizard=True)
         return True
 
     # ------------------------------------------------------------------
@@ -661,8 +966,7 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
     # ------------------------------------------------------------------
     if gdd_wizard_active.get(session, False):
 
-        noise = {".", "uh", "um", ""}
-        if raw_text.lower().strip() in noise:
+        if is_noise(raw_text):
             return True
 
         async def _record_answer():
@@ -675,7 +979,7 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
                         pass
                 pending_review_task[session] = None
 
-                await ws.send_json({"type": "wizard_answer", "text": raw_text})
+                await _send(ws, {"type": "wizard_answer", "text": raw_text})
 
                 # 🔥 Add this:
                 gdd_answer_buffer.setdefault(session, []).append(raw_text.strip())
@@ -684,65 +988,55 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
                 # =============== DEFINE _review() ====================
                 async def _review():
                     try:
-                        from app.gdd_engine.gdd_questions import QUESTIONS
                         stage = gdd_wizard_stage.get(session, 0)
-                        question_text = QUESTIONS[stage] if 0 <= stage < len(QUESTIONS) else ""
+                        question_text = QUESTIONS[stage] if 0 <= stage < _TOTAL_QUESTIONS else ""
                         answer = " ".join(gdd_answer_buffer[session]).strip()
 
 
-                        # 1) Incomplete → nudge only
-                        last = gdd_answer_buffer[session][-1]
-                        if is_incomplete_answer(answer):
-                            nudge = pick_nudge()
-                            await ws.send_json({"type": "ai_review", "text": nudge})
+                        # 1) Declined / incomplete / short → canned reply, no LLM call
+                        nudge = cheap_review(question_text, answer)
+                        if nudge is not None:
+                            await _send(ws, {"type": "ai_review", "text": nudge})
 
                             if not assistant_is_speaking.get(session, False):
                                 cleaned = clean_sentence_for_tts(nudge)
                                 if cleaned:
-                                    enqueue_sentence_for_tts(session, cleaned, source="wizard")
+                                    enqueue_sentence_for_tts(session, cleaned, source="review")
                             return
 
-                        # 2) Short but complete → elaboration
-                        # 2) SHORT BUT COMPLETE ANSWER — BUT EXEMPT explicit requests
-                        request_keywords = ("suggest", "suggestion", "ideas", "sensations", "expand", "help", "inspire")
-
-                        if (
-                            3 <= len(answer.split()) <= 6 
-                            and answer.endswith((".", "!", "?"))
-                            and not any(k in answer.lower() for k in request_keywords)
-                        ):
-                            if "rts" in question_text.lower():
-                                nudge = "Would you like to expand on what makes your RTS idea unique?"
-                            else:
-                                nudge = "Would you like to expand on that thought?"
-
-                            await ws.send_json({"type": "ai_review", "text": nudge})
-
-                            if not assistant_is_speaking.get(session, False):
-                                cleaned_nudge = clean_sentence_for_tts(nudge)
-                                if cleaned_nudge:
-                                    enqueue_sentence_for_tts(session, cleaned_nudge, source="wizard")
-
-                            return
-
-
-                        # 3) Full critique
-                        review_prompt = (
-                            f"Question:\n{question_text}\n\n"
-                            f"User Answer:\n{answer}\n\n"
-                            "Offer 2–4 inspiring, collaborative suggestions that expand the idea. "
-                            "Avoid criticism. Build on the user’s creative direction."
+                        # 2) Full critique
+                        review_prompt = WIZARD_REVIEW_PROMPT.format_map(
+                            {"question": question_text, "answer": answer}
                         )
 
-                        review = await run_llm_short_review(review_prompt)
-                        await ws.send_json({"type": "ai_review", "text": review})
-
-                        cleaned = clean_sentence_for_tts(review)
-                        if cleaned:
-                            enqueue_sentence_for_tts(session, cleaned, source="wizard")
+                        # Speak each sentence as soon as it streams in instead of
+                        # waiting for the whole review before starting TTS
+                        async def _speak(sentence: str):
+                            cleaned = clean_sentence_for_tts(sentence)
+                            if cleaned:
+                                enqueue_sentence_for_tts(session, cleaned, source="review")
 
+                        review = get_cached_review(question_text, answer)
+                        if review is None:
+                            review = await run_llm_short_review(review_prompt, on_sentence=_speak)
+                            store_cached_review(question_text, answer, review)
+                        else:
+                            sentences, rest = extract_sentences(review)
+                            for sentence in sentences + [rest]:
+                                if sentence:
+                                    await _speak(sentence)
+
+                        # one bubble for the whole review (ws.js appends a new
+                        # message per ai_review frame)
+                        await _send(ws, {"type": "ai_review", "text": review})
+
+                    except asyncio.CancelledError:
+                        # Go Next / new speech: the rest of this review must not
+                        # play after (or over) the next question
+                        drop_queued_tts(session, "review")
+                        raise
                     except Exception as e:
-                        print("❌ LLM review failed:", e)
+                        logger.error("LLM review failed: %s", e)
 
                 # =============== DELAYED REVIEW ====================
                 async def delayed_review():
@@ -753,46 +1047,13 @@ async def process_gdd_wizard(ws: WebSocket, session: str, raw_text: str) -> bool
                         return
 
 
-                    # Recompute answer for scope correctness
-                    answer_local = " ".join(gdd_answer_buffer.get(session, []))
-
-
-                    try:
-                        from app.gdd_engine.gdd_questions import QUESTIONS
-                        stage_local = gdd_wizard_stage.get(session, 0)
-                        question_text_local = QUESTIONS[stage_local] if 0 <= stage_local < len(QUESTIONS) else ""
-                    except:
-                        question_text_local = ""
-
-                    # Short but complete → nudge
-                    request_keywords = ("suggest", "suggestion", "ideas", "sensations", "expand", "help", "inspire")
-                    
-                    if (
-                        3 <= len(answer_local.split()) <= 6
-                        and answer_local.endswith((".", "!", "?"))
-                        and not any(k in answer_local.lower() for k in request_keywords)
-                    ):
-
-                        if "rts" in question_text_local.lower():
-                            nudge = "Would you like to expand on what makes your RTS idea unique?"
-                        else:
-                            nudge = "Would you like to expand on that thought?"
-
-                        await ws.send_json({"type": "ai_review", "text": nudge})
-
-                        if not assistant_is_speaking.get(session, False):
-                            cleaned = clean_sentence_for_tts(nudge)
-                            if cleaned:
-                                enqueue_sentence_for_tts(session, cleaned, source="wizard")
-                        return
-
-                    # Otherwise do full critique
+                    # _review() runs the cheap checks before any LLM critique
                     await _review()
 
                 pending_review_task[session] = asyncio.create_task(delayed_review())
 
             except Exception as e:
-                print("❌ /gdd/answer failed:", e)
+                logger.error("/gdd/answer failed: %s", e)
 
         await _record_answer()
         return True
@@ -807,21 +1068,7 @@ async def generate_gdd_answer_review(question: str, answer: str) -> str:
     Focuses strictly on the given question.
     """
 
-    review_prompt = f"""
-You are a senior game designer reviewing ONE answer to a GDD question.
-Stay strictly inside THIS question's context.
-
-QUESTION:
-{question}
-
-ANSWER:
-{answer}
-
-Provide a short, concise 2–3 sentence suggestion.
-Do NOT ask new questions.
-Do NOT change topic.
-Only critique or refine the answer itself.
-"""
+    review_prompt = ANSWER_REVIEW_PROMPT.format_map({"question": question, "answer": answer})
 
     try:
         # Correct import for your orchestrator
@@ -833,7 +1080,7 @@ Only critique or refine the answer itself.
         return suggestion.strip()
 
     except Exception as e:
-        print("❌ LLM review failed:", e)
+        logger.error("LLM review failed: %s", e)
         return "👍 Answer noted."
 
 def estimate_completion_delay(text: str, is_wizard: bool) -> float:
@@ -880,36 +1127,34 @@ async def submit_after_delay(ws, session, delay):
 # ------------------------------------------------------------------
 # Main voice stream entrypoint (to be used by FastAPI websocket route)
 # ------------------------------------------------------------------
+# Built once per process — the credentials, region and audio format are the
+# same for every connection; only the push stream and recognizer are per-WS
+speech_stt_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
+stt_stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=SAMPLE_RATE, bits_per_sample=16, channels=1)
+
+
 async def azure_stream(ws: WebSocket):
-    session = str(uuid.uuid4())
-    print("WS connected:", session)
+    session = secrets.token_hex(16)
+    logger.info("WS connected: %s", session)
     ensure_structs(session)
     playback_ws_registry[session] = ws
 
-    # create push stream for Azure Speech SDK
-    push_stream = speechsdk.audio.PushAudioInputStream(
-        stream_format=speechsdk.audio.AudioStreamFormat(samples_per_second=SAMPLE_RATE, bits_per_sample=16, channels=1)
-    )
-
-    speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
-    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=speechsdk.audio.AudioConfig(stream=push_stream))
+    # per-connection push stream + recognizer; config and format are shared
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stt_stream_format)
+    recognizer = speechsdk.SpeechRecognizer(speech_config=speech_stt_config, audio_config=speechsdk.audio.AudioConfig(stream=push_stream))
 
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     # PARTIAL STT: forward partials to client and detect interruptions
-    def on_partial(evt):
+    async def on_partial(text):
         try:
-            text = (evt.result.text or "").strip()
 
             # ------------------------------------------------------
             # 1) Forward partial transcript to UI
             # ------------------------------------------------------
             if text:
                 try:
-                    asyncio.run_coroutine_threadsafe(
-                        ws.send_json({"type": "partial", "text": text}),
-                        loop
-                    )
+                    await _send(ws, {"type": "partial", "text": text})
                 except Exception:
                     pass
 
@@ -925,7 +1170,7 @@ async def azure_stream(ws: WebSocket):
             ):
                 try:
                     task.cancel()
-                    print(f"[{session}] Partial STT -> canceled pending wizard review")
+                    logger.debug("[%s] Partial STT -> canceled pending wizard review", session)
                 except Exception:
                     pass
             pending_review_task[session] = None   # ← REQUIRED RESET
@@ -933,10 +1178,12 @@ async def azure_stream(ws: WebSocket):
             # ------------------------------------------------------
             # 3) INTERRUPT SPEAKING ASSISTANT (barge-in)
             # ------------------------------------------------------
-            if assistant_is_speaking.get(session, False) and text not in ("", ".", "uh", "um"):
-                print(f"[{session}] Partial STT during speech -> interrupting")
+            if assistant_is_speaking.get(session, False) and not is_noise(text):
+                logger.debug("[%s] Partial STT during speech -> interrupting", session)
 
-                llm_stop_flags[session] = True
+                stop = llm_stop_events.get(session)
+                if stop:
+                    stop.set()
 
                 ev = tts_cancel_events.get(session)
                 if ev:
@@ -953,36 +1200,29 @@ async def azure_stream(ws: WebSocket):
                 assistant_is_speaking[session] = False
 
                 try:
-                    asyncio.run_coroutine_threadsafe(
-                        ws.send_json({"type": "stop_all"}),
-                        loop
-                    )
+                    await _send(ws, {"type": "stop_all"})
                 except Exception:
                     pass
 
         except Exception as e:
-            print("on_partial error:", e)
+            logger.error("on_partial error: %s", e)
 
 
 
     # FINAL STT: use unified wizard handler and then LLM if not handled
-    def on_final(evt):
+    def on_final(raw_text):
         try:
-            if evt.result.reason != speechsdk.ResultReason.RecognizedSpeech:
-                return
-
-            raw_text = evt.result.text.strip()
-            if not raw_text or raw_text.lower() in [".", "uh", "um"]:
+            if is_noise(raw_text):
                 return
 
-            print("🟢 Final STT:", raw_text)
+            logger.debug("Final STT: %s", raw_text)
 
             # -------------------------------------------------------
             # 1) IGNORE DUPLICATE FINALS FROM AZURE (CRITICAL)
             # -------------------------------------------------------
             # Azure often emits the same final result multiple times.
             if pending_user_text.get(session) == raw_text:
-                print(f"[{session}] Duplicate final STT ignored.")
+                logger.debug("[%s] Duplicate final STT ignored.", session)
                 return
 
             # Save latest transcript
@@ -995,7 +1235,7 @@ async def azure_stream(ws: WebSocket):
             if task and not task.done():
                 try:
                     task.cancel()
-                    print(f"[{session}] Final STT -> cancelled pending wizard review task")
+                    logger.debug("[%s] Final STT -> cancelled pending wizard review task", session)
                 except Exception:
                     pass
             pending_review_task[session] = None
@@ -1007,7 +1247,7 @@ async def azure_stream(ws: WebSocket):
             if existing and not existing.done():
                 try:
                     existing.cancel()
-                    print(f"[{session}] Final STT -> cancelled old completion timer")
+                    logger.debug("[%s] Final STT -> cancelled old completion timer", session)
                 except Exception:
                     pass
 
@@ -1022,100 +1262,194 @@ async def azure_stream(ws: WebSocket):
             # -------------------------------------------------------
             # 5) START DELAYED SUBMISSION (SMART COMPLETION 2.0)
             # -------------------------------------------------------
-            completion_timer[session] = asyncio.run_coroutine_threadsafe(
-                submit_after_delay(ws, session, delay),
-                loop
+            completion_timer[session] = asyncio.create_task(
+                submit_after_delay(ws, session, delay)
             )
 
         except Exception as e:
-            print("on_final error:", e)
-            traceback.print_exc()
+            logger.exception("on_final error: %s", e)
+
+    # The SDK fires recognizing / recognized on its own threads. They only hop
+    # the text onto the loop; one consumer coroutine runs the handlers above,
+    # so session state is only ever touched from the event loop.
+    stt_events: asyncio.Queue = asyncio.Queue(maxsize=STT_QUEUE_SIZE)
+
+    def post_stt_event(kind, text):
+        # runs on the loop (via call_soon_threadsafe)
+        if stt_events.full():
+            if kind == "partial":
+                return   # a newer partial is on its way
+            stt_events.get_nowait()
+        stt_events.put_nowait((kind, text))
+
+    # Partials fire many times a second; drop repeats and anything within
+    # STT_PARTIAL_INTERVAL of the last one before it reaches the loop.
+    # The final result always goes through, so nothing is lost for good.
+    last_partial = ""
+    last_partial_at = 0.0
+
+    def on_recognizing(evt):
+        nonlocal last_partial, last_partial_at
+        text = (evt.result.text or "").strip()
+        now = time.monotonic()
+        if text == last_partial or now - last_partial_at < STT_PARTIAL_INTERVAL:
+            return
+        last_partial, last_partial_at = text, now
+        loop.call_soon_threadsafe(post_stt_event, "partial", text)
+
+    def on_recognized(evt):
+        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            loop.call_soon_threadsafe(post_stt_event, "final", evt.result.text.strip())
+
+    async def handle_stt_event(kind, text):
+        if kind == "partial":
+            await on_partial(text)
+        else:
+            on_final(text)
+
+    async def pump_stt_events():
+        while True:
+            kind, text = await stt_events.get()
+            # Partials queued back-to-back are superseded by the newest one
+            while kind == "partial" and not stt_events.empty():
+                next_kind, next_text = stt_events.get_nowait()
+                if next_kind != "partial":
+                    await handle_stt_event(kind, text)
+                kind, text = next_kind, next_text
+            await handle_stt_event(kind, text)
+
+    stt_consumer = asyncio.create_task(pump_stt_events())
+
+    recognizer.recognizing.connect(on_recognizing)
+    recognizer.recognized.connect(on_recognized)
+    # Starting opens the service connection; wait for it off the event loop
+    await asyncio.to_thread(recognizer.start_continuous_recognition)
+    logger.debug("Azure STT started")
+
+    # Control messages (typed text, stop_llm) run on their own task, so a slow
+    # wizard step never holds up the audio frames behind it.
+    async def on_text(data: dict):
+        # typed text message
+        handled = await process_gdd_wizard(ws, session, data.get("text", ""))
+        if handled:
+            return
+        # if llm is busy, skip duplicate typed calls
+        if llm_busy.get(session):
+            logger.debug("[%s] LLM busy - skip typed call", session)
+            return
+        # mark busy and spawn llm stream
+        # mark busy and spawn llm stream (defensive)
+        try:
+            llm_busy[session] = True
+            await _send(ws, {"type": "final", "text": data.get("text", "")})
+            if not spawn_session_task(session, stream_llm_to_client(ws, session, data.get("text", ""))):
+                llm_busy[session] = False
+                await notify_busy(ws)
+        except Exception as e:
+            logger.error("[%s] failed to spawn LLM stream: %s", session, e)
+            llm_busy[session] = False
+
+    async def on_stop_llm(data: dict):
+        # stop everything immediately
+        logger.debug("[%s] STOP_LLM received -> cancelling", session)
+        stop = llm_stop_events.get(session)
+        if stop:
+            stop.set()
+        ev = tts_cancel_events.get(session)
+        if ev:
+            ev.set()
+        cancel_tts_generation(session)
+        worker = tts_playback_task.get(session)
+        if worker and not worker.done():
+            try:
+                worker.cancel()
+            except Exception:
+                pass
+        # reset events
+        tts_cancel_events[session] = asyncio.Event()
+        assistant_is_speaking[session] = False
+        try:
+            await _send(ws, {"type": "stop_all"})
+        except Exception:
+            pass
+        # allow future llm calls
+        llm_busy[session] = False
 
+    control_handlers = {"text": on_text, "stop_llm": on_stop_llm}
 
+    async def handle_control(raw: str):
+        try:
+            data = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return
+        if not isinstance(data, dict):
+            return
+        handler = control_handlers.get(data.get("type"))
+        if handler:
+            await handler(data)
 
-    recognizer.recognizing.connect(on_partial)
-    recognizer.recognized.connect(on_final)
-    recognizer.start_continuous_recognition_async().get()
-    print("🎤 Azure STT started successfully")
+    control_msgs: asyncio.Queue = asyncio.Queue()
 
-    # Main websocket loop: handles typed text and stop commands and incoming audio bytes from client
+    async def pump_control():
+        while True:
+            raw = await control_msgs.get()
+            try:
+                await handle_control(raw)
+            except Exception as e:
+                logger.exception("[%s] control message error: %s", session, e)
+
+    control_consumer = asyncio.create_task(pump_control())
+
+    # Mic frames are small (20 ms); whatever arrived while the writer was
+    # waiting for the loop goes to the SDK in one write instead of one each.
+    audio_frames: asyncio.Queue = asyncio.Queue()
+
+    async def pump_audio():
+        while True:
+            frames = [await audio_frames.get()]
+            while not audio_frames.empty() and len(frames) < STT_WRITE_MAX_FRAMES:
+                frames.append(audio_frames.get_nowait())
+            try:
+                push_stream.write(frames[0] if len(frames) == 1 else b"".join(frames))
+            except Exception:
+                pass
+
+    audio_writer = asyncio.create_task(pump_audio())
+
+    # Main websocket loop: mic PCM is queued for the audio writer;
+    # text frames are handed to the control task
     try:
         while True:
             msg = await ws.receive()
+            audio = msg.get("bytes")
+            if audio:
+                audio_frames.put_nowait(audio)
+                continue
+
             if msg["type"] == "websocket.disconnect":
                 break
 
-            if msg.get("text"):
-                try:
-                    data = json.loads(msg["text"])
-                except Exception:
-                    data = None
-
-                if data:
-                    # typed text message
-                    if data.get("type") == "text":
-                        handled = await process_gdd_wizard(ws, session, data.get("text", ""))
-                        if handled:
-                            continue
-                        # if llm is busy, skip duplicate typed calls
-                        if llm_busy.get(session):
-                            print(f"[{session}] LLM busy - skip typed call")
-                            continue
-                        # mark busy and spawn llm stream
-                        # mark busy and spawn llm stream (defensive)
-                        try:
-                            llm_busy[session] = True
-                            await ws.send_json({"type": "final", "text": data.get("text", "")})
-                            asyncio.create_task(stream_llm_to_client(ws, session, data.get("text", "")))
-                        except Exception as e:
-                            print(f"[{session}] failed to spawn LLM stream: {e}")
-                            llm_busy[session] = False
-
-                        continue
-
-                    if data.get("type") == "stop_llm":
-                        # stop everything immediately
-                        print(f"[{session}] STOP_LLm received -> cancelling")
-                        llm_stop_flags[session] = True
-                        ev = tts_cancel_events.get(session)
-                        if ev:
-                            ev.set()
-                        cancel_tts_generation(session)
-                        worker = tts_playback_task.get(session)
-                        if worker and not worker.done():
-                            try:
-                                worker.cancel()
-                            except Exception:
-                                pass
-                        # reset events
-                        tts_cancel_events[session] = asyncio.Event()
-                        assistant_is_speaking[session] = False
-                        try:
-                            await ws.send_json({"type": "stop_all"})
-                        except Exception:
-                            pass
-                        # allow future llm calls
-                        llm_busy[session] = False
-                        continue
-
-            # binary audio frames (mic PCM) forwarded to Azure push stream
-            if msg.get("bytes"):
-                try:
-                    push_stream.write(msg["bytes"])
-                except Exception:
-                    pass
+            text = msg.get("text")
+            if text:
+                control_msgs.put_nowait(text)
 
     finally:
         # cleanup
+        audio_writer.cancel()
+
+        # No more STT events into this session from the SDK's threads
+        recognizer.recognizing.disconnect_all()
+        recognizer.recognized.disconnect_all()
+
         try:
             push_stream.close()
         except Exception:
             pass
 
-        try:
-            recognizer.stop_continuous_recognition()
-        except Exception:
-            pass
+        # Anything still queued belongs to a closed socket
+        stt_consumer.cancel()
+        control_consumer.cancel()
+        cancel_session_tasks(session)
 
         cancel_tts_generation(session)
         worker = tts_playback_task.get(session)
@@ -1126,7 +1460,14 @@ async def azure_stream(ws: WebSocket):
                 pass
 
         cleanup_session(session)
-        print("WS closed:", session)
+
+        # Stopping waits for the service to ack; like the start, keep it
+        # off the event loop. Last, so nothing above depends on it finishing.
+        try:
+            await asyncio.to_thread(recognizer.stop_continuous_recognition)
+        except Exception:
+            pass
+        logger.info("WS closed: %s", session)
 
 # ------------------------------------------------------------------
 # Text message handler — TEXT path (typed messages)
@@ -1140,7 +1481,7 @@ async def handle_text_message(ws, text, session):
 
     # 🚨 Block duplicate LLM calls IMMEDIATELY
     if llm_busy.get(session):
-        print(f"[{session}] LLM BUSY → ignoring duplicate handle_text_message()")
+        logger.debug("[%s] LLM busy -> ignoring duplicate handle_text_message()", session)
         return
 
     # Mark busy BEFORE any async wizard or LLM logic
@@ -1152,8 +1493,11 @@ async def handle_text_message(ws, text, session):
         llm_busy[session] = False     # Wizard does NOT run LLM
         return
 
+    # Start the knowledge-base lookup now so it overlaps the echo below
+    rag_task = asyncio.create_task(rag.asearch(text, k=5))
+
     # Echo user message
-    await ws.send_json({"type": "final", "text": text})
+    await _send(ws, {"type": "final", "text": text})
 
     # Run LLM streaming
     # -----------------------------
@@ -1164,8 +1508,8 @@ async def handle_text_message(ws, text, session):
     # -----------------------------
     rag_context = ""
     try:
-        from app.rag_engine import rag_engine
-        rag_results = rag_engine.search(text, k=5)
+        # Embed + FAISS lookup run on the RAG thread pool, not the event loop
+        rag_results = await rag_task
 
         if rag_results:
             parts = []
@@ -1188,7 +1532,7 @@ async def handle_text_message(ws, text, session):
                 + "\n\n"
             )
     except Exception as e:
-        print(f"[{session}] RAG import/search failed: {e}")
+        logger.warning("[%s] RAG search failed: %s", session, e)
         rag_context = ""
 
 
@@ -1204,5 +1548,8 @@ async def handle_text_message(ws, text, session):
 
     full_query = f"{system_prompt}\n\n{rag_context}User: {text}\nAssistant:"
 
-    asyncio.create_task(stream_llm_to_client(ws, session, full_query))
+    # Context is already in full_query — don't let stream_llm search again
+    if not spawn_session_task(session, stream_llm_to_client(ws, session, full_query, use_rag=False)):
+        llm_busy[session] = False
+        await notify_busy(ws)
 